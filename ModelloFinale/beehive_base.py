@@ -7,6 +7,7 @@ from mesa.visualization.ModularVisualization import ModularServer
 from mesa.visualization.modules import CanvasGrid, ChartModule
 from mesa.visualization.UserParam import UserParam
 import yaml
+from brood import BroodPool
 from mesa.visualization.UserParam import Slider
 random.seed(42)  
 
@@ -134,12 +135,10 @@ class Bee(Agent):
     def feed_larvae(self):
         if self.model.hive_resources > 2 and self.model.larvae_count > 0:
             self.model.hive_resources -= 3
-            for larvae in self.model.larvae_list:
-                if not larvae.matured:
-                    larvae.matured = True
-                    self.model.create_new_bee(larvae)
-                    break
-                    #return 
+            larvae = self.model.brood.pop_next()
+            if larvae is not None:
+                larvae.matured = True
+                self.model.create_new_bee(larvae)
 
 
 class Cell(object):
@@ -173,7 +172,7 @@ class QueenBee(Agent):
                         x = random.randrange(self.model.grid.width)
                         y = random.randrange(self.model.grid.height)
                     self.model.grid.place_agent(new_larvae, (x, y))
-                    self.model.larvae_list.append(new_larvae)
+                    self.model.brood.add(new_larvae)
                     self.model.larvae_count += 1
 
     def step(self):
@@ -207,7 +206,7 @@ class HiveModel(Model):
         self.hive_resources = num_resources
         self.larvae_count = 0
         self.adult_bees_count = 0
-        self.larvae_list = []  
+        self.brood = BroodPool()
         self.larvae_maturity_threshold = 1 
 
         # piccolo check del numero di apine iniziali lollino
@@ -296,7 +295,7 @@ class HiveModel(Model):
         self.grid.remove_agent(larvae)
         self.schedule.remove(larvae)
 
-        self.larvae_list.remove(larvae)
+        self.brood.retire(larvae)
         self.larvae_count -= 1
 
     def count_resources(self):
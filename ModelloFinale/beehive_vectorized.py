@@ -0,0 +1,362 @@
+import numpy as np
+import pandas as pd
+from counter_rng import BIRTH, LAY, PLACE, STEP, model_uniforms, seed_entropy, seed_key, uniforms
+from neighborhood import NeighborhoodTable
+
+'''
+motore alternativo per HiveModel (beehivemodel_modellofinale.py): invece di un
+oggetto Bee per ogni ape, età, JH_level, lifecredit, task e posizione stanno in
+array NumPy e uno step è una manciata di operazioni su array.
+
+le regole sono le stesse del modello ad agenti:
+- feed: ogni ape mangia 1 risorsa e invecchia, altrimenti perde un lifecredit
+- JH_level += 0.01 * age, soglie 0.3 / 0.6 per Nurse / Guard / Forager
+- morte oltre i 35 giorni, morte al 10% se non ci sono guardiane
+- forager muore al 10% altrimenti porta randint(1, 8) risorse
+- guard muore al 20%
+- nurse nutre una larva adiacente (costo 3) e poi si sposta in una cella vuota
+
+e anche l'ordine è lo stesso: le nurse guardano le larve di inizio step, poi
+la regina mangia e depone, poi ogni ape nell'ordine dello scheduler mangia,
+aggiorna JH e task, muore o fa il suo compito con le risorse lasciate da quelle
+prima (vedi advance), infine le nurse si spostano tutte insieme come con
+HiveModel(batch_moves=True). I numeri casuali sono quelli di counter_rng, con
+la stessa chiave (seed, id dell'ape) e gli stessi stream di HiveModel.
+
+non è una copia numero per numero: le larve in HiveModel consumano id, quindi
+dal secondo step le api nuove hanno id (e numeri casuali) diversi, e le celle
+libere sono estratte da elenchi in un altro ordine. I due motori danno lo
+stesso censimento al primo step e la stessa media su più seed.
+'''
+
+NURSE, GUARD, FORAGER = 0, 1, 2
+TASKS = ('Nurse', 'Guard', 'Forager')
+
+EMPTY, BEE, LARVA, QUEEN = 0, 1, 2, 3
+
+
+class VectorHiveModel:
+    def __init__(self, N, width, height, num_resources, percentage_foragers, percentage_nurses, percentage_guards, laying_rate, seed=None):
+        self.entropy = seed_entropy(seed)
+        self.key = seed_key(self.entropy)
+        # come in HiveModel la regina è l'agente 1, le api partono da 2
+        self.current_id = 1
+        self.num_bees = N
+        self.width = width
+        self.height = height
+        self.maxresource = num_resources
+        self.hive_resources = num_resources
+        self.steps = 0
+
+        if (percentage_foragers + percentage_nurses + percentage_guards) > 1:
+            print("La somma delle percentuali delle api non è 1. Foragers ", percentage_foragers, " nurses ", percentage_nurses," guards",  percentage_guards)
+            return
+
+        self.num_of_foragers = int(self.num_bees*percentage_foragers)
+        self.num_of_nurses = int(self.num_bees*percentage_nurses)
+        self.num_of_guards = int(self.num_bees*percentage_guards)
+
+        # cells[x, y] dice cosa occupa la cella (EMPTY, BEE, LARVA, QUEEN)
+        self.cells = np.zeros((width, height), dtype=np.int8)
+        self.neighbors = NeighborhoodTable(width, height)
+
+        self.queen_pos = (width // 2, height // 2)
+        self.queen_age = 0
+        self.queen_max_age = 1000
+        self.queen_alive = True
+        self.laying_rate = laying_rate
+        self.cells[self.queen_pos] = QUEEN
+
+        # stesso ordine di creazione del modello ad agenti: foragers, nurses, guards
+        task = np.concatenate([
+            np.full(self.num_of_foragers, FORAGER, dtype=np.int8),
+            np.full(self.num_of_nurses, NURSE, dtype=np.int8),
+            np.full(self.num_of_guards, GUARD, dtype=np.int8),
+        ])
+        self.task = task
+        self.ids = self._next_ids(len(task))
+        self.age, self.JH_level = self._initial_state(task, self.ids)
+        self.lifecredit = np.full(len(task), 3, dtype=np.int64)
+        self.x, self.y = self._take_free_cells(len(task), BEE, PLACE)
+
+        self.larvae_x = np.empty(0, dtype=np.int64)
+        self.larvae_y = np.empty(0, dtype=np.int64)
+
+        self.totalbees = {
+        "Nurse": 0,
+        "Guard": 0,
+        "Forager": 0,
+        "Larvae": 0}
+
+        self.model_vars = {'Nurse': [], 'Guard': [], 'Forager': [], 'Larvae': [], 'Resource': []}
+        self.collect()
+
+    def _next_ids(self, n):
+        ids = np.arange(self.current_id + 1, self.current_id + 1 + n)
+        self.current_id += n
+        return ids
+
+    def _initial_state(self, task, ids):
+        n = len(task)
+        age = np.empty(n, dtype=np.int64)
+        jh = np.empty(n, dtype=np.float64)
+        birth = uniforms(self.key, ids, 0, BIRTH)
+
+        # stessi intervalli di Bee.__init__
+        for t, (age_lo, age_hi), (jh_lo, jh_hi) in (
+            (NURSE, (1, 7), (0, 0.23)),
+            (GUARD, (7, 20), (0.3, 0.53)),
+            (FORAGER, (21, 35), (0.6, 0.8)),
+        ):
+            mask = task == t
+            age[mask] = age_lo + (birth[mask, 0] * (age_hi - age_lo + 1)).astype(np.int64)
+            jh[mask] = jh_lo + (jh_hi - jh_lo) * birth[mask, 1]
+        return age, jh
+
+    def _take_free_cells(self, n, kind, stream):
+        # n celle libere distinte: si estraggono 2n + 8 candidate e si tengono
+        # le prime n diverse; solo a griglia quasi piena si ordina
+        # un'uniforme per ogni cella libera
+        free = np.flatnonzero(self.cells.ravel() == EMPTY)
+        picks = (model_uniforms(self.key, self.steps, stream, 2 * n + 8) * len(free)).astype(np.int64)
+        _, first = np.unique(picks, return_index=True)
+        if len(first) >= n:
+            chosen = free[picks[np.sort(first)[:n]]]
+        else:
+            u = model_uniforms(self.key, self.steps, stream, len(free))
+            chosen = free[np.argsort(u, kind='stable')[:n]]
+        self.cells.ravel()[chosen] = kind
+        return np.unravel_index(chosen, self.cells.shape)
+
+    def _neighbors(self, x, y):
+        # righe = api, colonne = gli 8 vicini, dalle tabelle precalcolate
+        nx = self.neighbors.x[1][x, y].astype(np.int64)
+        ny = self.neighbors.y[1][x, y].astype(np.int64)
+        return nx, ny
+
+    def step(self):
+        # [guardiane assenti, rischio del task, raccolto, spostamento] come in HiveModel.prepare_draws
+        draws = uniforms(self.key, self.ids, self.steps, STEP)
+
+        # --- come Bee.step: stato di inizio step, prima che la regina deponga ---
+        doomed = (self.totalbees['Guard'] == 0) & (draws[:, 0] < 0.1)
+        target = self.lookaround()
+
+        # --- regina, prima nello scheduler ---
+        if self.queen_alive:
+            if self.hive_resources > 0:
+                self.queen_age += 1
+                self.hive_resources -= 1
+
+            if self.queen_age <= self.queen_max_age:
+                self.lay_eggs()
+            else:
+                self.cells[self.queen_pos] = EMPTY
+                self.queen_alive = False
+
+        # --- come Bee.advance, ape per ape ---
+        alive, feeding, moving = self.advance(draws, doomed, target)
+
+        # le api morte liberano la cella prima che le nurse si muovano
+        self.cells[self.x[~alive], self.y[~alive]] = EMPTY
+
+        # le larve nutrite diventano nuove nurse nella stessa cella
+        born = target[feeding]
+        matured = np.isin(self.larvae_x * self.height + self.larvae_y, born)
+        self.larvae_x = self.larvae_x[~matured]
+        self.larvae_y = self.larvae_y[~matured]
+
+        move = draws[alive, 3]
+        nurses = np.flatnonzero(moving[alive])
+        self._compact(alive)
+        if len(born):
+            self._add_bees(*np.divmod(born, self.height))
+
+        # --- nurse: movimento ---
+        self.movearound(nurses, move[nurses])
+
+        self.steps += 1
+        self.collect()
+
+    def lay_eggs(self):
+        if self.count_nurses() > 0 and self.count_resources() > 0:
+            # se l'alveare è pieno la regina depone solo nelle celle libere rimaste
+            free = int((self.cells == EMPTY).sum())
+            lx, ly = self._take_free_cells(min(self.laying_rate, free), LARVA, LAY)
+            self.larvae_x = np.concatenate([self.larvae_x, lx])
+            self.larvae_y = np.concatenate([self.larvae_y, ly])
+
+    def lookaround(self):
+        # cella (indice piatto) della prima larva attorno a ogni possibile
+        # nurse, -1 se non ce ne sono; JH non scende, le altre non saranno nurse
+        target = np.full(len(self.task), -1, dtype=np.int64)
+        if len(self.larvae_x) == 0:
+            return target
+
+        bees = np.flatnonzero(self.JH_level + 0.01 * self.age < 0.3)
+        nx, ny = self._neighbors(self.x[bees], self.y[bees])
+        is_larva = self.cells[nx, ny] == LARVA
+        first = is_larva.argmax(axis=1)
+        rows = np.flatnonzero(is_larva.any(axis=1))
+        target[bees[rows]] = nx[rows, first[rows]] * self.height + ny[rows, first[rows]]
+        return target
+
+    def advance(self, draws, doomed, target):
+        '''
+        Bee.advance per tutte le api, nell'ordine dello scheduler: mangiare, JH
+        e task, morte, compito. Ogni ape trova le risorse lasciate da quelle
+        prima: mangia solo se ce ne sono, una forager porta cibo solo se
+        l'alveare non è oltre maxresource, una nurse fa nascere la sua larva
+        solo se restano più di 2 risorse e nessuna nurse prima l'ha già fatta
+        nascere. Restituisce le api vive, le nurse che fanno nascere la larva
+        target e quelle che poi si spostano.
+        '''
+        r0 = self.hive_resources
+        n = len(self.task)
+        loads = 1 + (draws[:, 2] * 8).astype(np.int64)
+        if r0 - n - 3 * int((target >= 0).sum()) > 2:
+            fed, gains, feeding = self._advance_all_fed(r0, loads, draws, doomed, target)
+        else:
+            fed, gains, feeding = self._advance_in_order(r0, loads, draws, doomed, target)
+        state = self._feed(fed, doomed)
+
+        self.hive_resources = r0 - int(fed.sum()) + int(loads[gains].sum()) - 3 * int(feeding.sum())
+        self.age, self.lifecredit, self.JH_level, self.task, acting = state
+        killed = ((self.task == FORAGER) & (draws[:, 1] < 0.1)) | ((self.task == GUARD) & (draws[:, 1] > 0.8))
+        return acting & ~killed, feeding, acting & (self.task == NURSE)
+
+    def _advance_all_fed(self, r0, loads, draws, doomed, target):
+        # anche spendendo il massimo le risorse non finiscono: mangiano tutte,
+        # ogni larva la fa nascere la prima nurse e conta solo il tetto
+        fed = np.ones(len(target), dtype=bool)
+        _, _, _, task, acting = self._feed(fed, doomed)
+        feeding = self._first_nurses(acting & (task == NURSE), target)
+        gainers = np.flatnonzero(acting & (task == FORAGER) & (draws[:, 1] >= 0.1))
+        # risorse davanti a ogni forager dopo il suo pasto, senza i raccolti
+        level = r0 - np.cumsum(1 + 3 * feeding)
+        gains = np.zeros(len(target), dtype=bool)
+        gains[gainers] = self._cap_gains(level[gainers], loads[gainers])
+        return fed, gains, feeding
+
+    def _advance_in_order(self, r0, loads, draws, doomed, target):
+        # risorse agli sgoccioli: chi mangia cambia età e quindi compito, si va
+        # ape per ape con quello che farebbe mangiando (1 raccolto, 2 larva) o no
+        roles = []
+        for fed in (True, False):
+            _, _, _, task, acting = self._feed(np.full(len(target), fed), doomed)
+            role = np.where(acting & (task == FORAGER) & (draws[:, 1] >= 0.1), 1, 0)
+            role[acting & (task == NURSE) & (target >= 0)] = 2
+            roles.append(role.tolist())
+
+        fed, gains, feeding = [], [], []
+        matured = set()
+        r = r0
+        for if_fed, if_not, load, cell in zip(*roles, loads.tolist(), target.tolist()):
+            fed.append(r > 0)
+            role = if_fed if r > 0 else if_not
+            r -= fed[-1]
+            gains.append(role == 1 and r <= self.maxresource)
+            feeding.append(role == 2 and r > 2 and cell not in matured)
+            if gains[-1]:
+                r += load
+            elif feeding[-1]:
+                r -= 3
+                matured.add(cell)
+        return np.array(fed, dtype=bool), np.array(gains, dtype=bool), np.array(feeding, dtype=bool)
+
+    def _feed(self, fed, doomed):
+        # età, lifecredit, JH, task e chi agisce ancora, se mangiano le api fed
+        age = self.age + fed
+        lifecredit = np.where(fed, 3, self.lifecredit - 1)
+        JH_level = np.clip(self.JH_level + 0.01 * age, 0.0, 1.0)
+        task = np.where(JH_level < 0.3, NURSE, np.where(JH_level < 0.6, GUARD, FORAGER)).astype(np.int8)
+        # morte per assenza di guardiane, vecchiaia o fame: non agiscono più
+        acting = ~doomed & (age <= 35) & (lifecredit > 0)
+        return age, lifecredit, JH_level, task, acting
+
+    def _first_nurses(self, nurses, target):
+        # la stessa larva la fa nascere solo la prima nurse in ordine
+        idx = np.flatnonzero(nurses & (target >= 0))
+        _, first = np.unique(target[idx], return_index=True)
+        feeding = np.zeros(len(target), dtype=bool)
+        feeding[idx[first]] = True
+        return feeding
+
+    def _cap_gains(self, level, loads):
+        # la forager j porta loads[j] se level[j] più i raccolti accettati
+        # prima non supera maxresource; finché si resta sotto passano tutti
+        before = level + np.cumsum(loads) - loads
+        over = np.flatnonzero(before > self.maxresource)
+        k = over[0] if len(over) else len(level)
+        accepted = np.arange(len(level)) < k
+        extra = int(loads[:k].sum())
+        for j, (lv, load) in enumerate(zip(level[k:].tolist(), loads[k:].tolist()), k):
+            if lv + extra <= self.maxresource:
+                extra += load
+                accepted[j] = True
+        return accepted
+
+    def movearound(self, nurses, move):
+        if len(nurses) == 0:
+            return
+
+        nx, ny = self._neighbors(self.x[nurses], self.y[nurses])
+        choice = (move * nx.shape[1]).astype(np.int64)
+        rows = np.arange(len(nurses))
+        tx = nx[rows, choice]
+        ty = ny[rows, choice]
+
+        # si muove solo chi punta a una cella vuota, a parità vince la prima in ordine
+        ok = np.flatnonzero(self.cells[tx, ty] == EMPTY)
+        _, first = np.unique(tx[ok] * self.height + ty[ok], return_index=True)
+        ok = ok[first]
+        movers = nurses[ok]
+
+        self.cells[self.x[movers], self.y[movers]] = EMPTY
+        self.x[movers] = tx[ok]
+        self.y[movers] = ty[ok]
+        self.cells[self.x[movers], self.y[movers]] = BEE
+
+    def _compact(self, alive):
+        self.ids = self.ids[alive]
+        self.age = self.age[alive]
+        self.JH_level = self.JH_level[alive]
+        self.lifecredit = self.lifecredit[alive]
+        self.task = self.task[alive]
+        self.x = self.x[alive]
+        self.y = self.y[alive]
+
+    def _add_bees(self, bx, by):
+        task = np.full(len(bx), NURSE, dtype=np.int8)
+        ids = self._next_ids(len(bx))
+        age, jh = self._initial_state(task, ids)
+        self.ids = np.concatenate([self.ids, ids])
+        self.age = np.concatenate([self.age, age])
+        self.JH_level = np.concatenate([self.JH_level, jh])
+        self.lifecredit = np.concatenate([self.lifecredit, np.full(len(bx), 3, dtype=np.int64)])
+        self.task = np.concatenate([self.task, task])
+        self.x = np.concatenate([self.x, bx])
+        self.y = np.concatenate([self.y, by])
+        self.cells[bx, by] = BEE
+
+    def count_resources(self):
+        return self.hive_resources
+
+    def count_nurses(self):
+        return self.totalbees['Nurse']
+
+    def count_agents_by_task(self):
+        counts = np.bincount(self.task, minlength=3)
+        for t, name in enumerate(TASKS):
+            self.totalbees[name] = int(counts[t])
+        self.totalbees['Larvae'] = len(self.larvae_x)
+        return self.totalbees
+
+    def collect(self):
+        census = self.count_agents_by_task()
+        for name in ('Nurse', 'Guard', 'Forager', 'Larvae'):
+            self.model_vars[name].append(census[name])
+        self.model_vars['Resource'].append(self.count_resources())
+
+    def get_model_vars_dataframe(self):
+        return pd.DataFrame(self.model_vars)
@@ -1,14 +1,23 @@
 from mesa import Agent, Model
 from mesa.space import MultiGrid
 from mesa.time import RandomActivation, SimultaneousActivation
-from mesa.datacollection import DataCollector
-import random
-from mesa.visualization.ModularVisualization import ModularServer
-from mesa.visualization.modules import CanvasGrid, ChartModule
-from mesa.visualization.UserParam import UserParam
+import numpy as np
 import yaml
-from mesa.visualization.UserParam import Slider
-random.seed(42)  
+from census import CensusCollector, CollectionPolicy
+from counter_rng import BIRTH, LAY, PLACE, STEP, model_uniforms, seed_entropy, seed_key, uniforms
+from neighborhood import NeighborhoodTable
+
+# valori di default dei parametri, gli stessi degli slider del server
+default_params = {
+    "N": 150,
+    "width": 17,
+    "height": 17,
+    "num_resources": 450,
+    "percentage_foragers": 0.4,
+    "percentage_nurses": 0.4,
+    "percentage_guards": 0.2,
+    "laying_rate": 10
+}
 
 
 '''
@@ -19,102 +28,148 @@ quello che posso aggiungere è che le api ad ogni step:
 
 '''
 
-def is_position_taken(self, pos):
-    return not self.grid.is_cell_empty(pos)
-
 class Larvae(Agent):
+    # True dopo HiveModel.remove_agent, fino a fine step resta sulla griglia
+    dead = False
+
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
         self.matured = False
 
 class Bee(Agent):
-    def __init__(self, unique_id, model, task):
+    max_age = 35
+    dead = False
+
+    def __init__(self, unique_id, model, task, birth=None):
         super().__init__(unique_id, model)
         self.task = task
         self.age = 0
         self.JH_level = 0
         self.lifecredit = 3
+        # True tra step() e advance(): le api nate durante advance() aspettano il prossimo step
+        self.staged = False
+        # uniformi di nascita dell'ape (età, JH), chi crea tante api le estrae tutte insieme
+        if birth is None:
+            birth = model.birth_uniforms([unique_id])[0]
+        u_age, u_JH = birth[0], birth[1]
 
         if self.task == 'Nurse':                     # api appena nate da maturazione di larve
-            self.age = random.randint(1, 7)
-            self.JH_level = random.uniform(0, 0.23)
+            self.age = 1 + int(u_age * 7)
+            self.JH_level = 0.23 * u_JH
             self.task = task
             
         elif self.task == 'Guard':                   # api adulte ma che non hanno ancora raggiunto le 3sett di vita
-            self.age = random.randint(7, 20)
-            self.JH_level = random.uniform(0.3, 0.53)
+            self.age = 7 + int(u_age * 14)
+            self.JH_level = 0.3 + 0.23 * u_JH
             self.task = task
 
         elif self.task == 'Forager':                 # api adulte oltre le 3sett di vita. hanno JH maggiore
-            self.age = random.randint(21, 35)
-            self.JH_level = random.uniform(0.6, 0.8)
+            self.age = 21 + int(u_age * 15)
+            self.JH_level = 0.6 + 0.2 * u_JH
             self.task = task
+
+        # se mangia ogni step l'ape va in pensione quando supera max_age
+        self.model.post_event(self.model.schedule.steps + self.max_age + 1 - self.age, 'retire', self)
             
-    def assign_task(self):
-        if self.JH_level < 0.3:
+    def assign_task(self, JH_level=None):
+        if JH_level is None:
+            JH_level = self.JH_level
+        if JH_level < 0.3:
             return 'Nurse'
-        elif 0.3 <= self.JH_level < 0.6:
+        elif 0.3 <= JH_level < 0.6:
             return 'Guard'
         else:
             return 'Forager'
-        
+
     def step(self):
+        '''
+        prima fase di SimultaneousActivation: l'ape guarda lo stato del modello
+        com'è a inizio step, senza toccarlo, ed estrae i numeri casuali che le
+        serviranno. Cibo, età e quindi JH e task dipendono da chi mangia prima,
+        per questo li decide advance() insieme a tutto il resto.
+        '''
+        # morta in questo step, aspetta solo di essere tolta
+        if self.dead:
+            return
+        model = self.model
+        self.staged = True
+        # estratti per tutte le api a inizio step, vedi HiveModel.prepare_draws
+        no_guards, roll, gain, move = model.draws[self.unique_id]
+        self.next_death = model.totalbees['Guard'] == 0 and no_guards < 0.1
+        # rischio del compito (forager o guard) e raccolto, se sarà forager
+        self.next_roll = roll
+        self.next_gain = 1 + int(gain * 8)
+        self.next_larva = None
+        self.next_move = None
+
+        # vecchiaia e fame dipendono dal cibo, le controlla advance()
+
+        # JH non scende mai: se supera 0.3 anche senza mangiare non sarà nurse
+        if self.JH_level + 0.01 * self.age < 0.3:
+            self.next_larva = self.lookaround()
+            # solo le nurse si muovono per andare a cercare le larve; con
+            # batch_moves si muovono tutte insieme, vedi HiveModel.move_nurses
+            if not model.batch_moves:
+                possible_steps = model.neighbors.neighborhood(self.pos)
+                self.next_move = possible_steps[int(move * len(possible_steps))]
+
+    def advance(self):
+        '''
+        seconda fase: applica quello che step() ha preparato. I conflitti si
+        risolvono nell'ordine dello scheduler: chi arriva quando le risorse sono
+        finite resta a digiuno (e non invecchia), le forager portano cibo finché
+        l'alveare non supera maxresource, una larva la fa nascere solo la prima
+        nurse e ci si sposta solo in una cella ancora vuota.
+        '''
+        # morta o nata durante questo step
+        if self.dead or not self.staged:
+            return
+        self.staged = False
+        model = self.model
         self.feed()
         self.JH_level = min(1.0, max(0.0, self.JH_level + 0.01 * self.age))
-        self.task = self.assign_task()
-
-        if self.model.totalbees['Guard'] == 0 and self.pos is not None:
-            if random.random() < 0.1:
-                #print("Ape morta")
-                self.model.grid.remove_agent(self)
-                self.model.schedule.remove(self)
-                return
-        
-        if self.age > 35 and self.pos is not None:
-            self.model.grid.remove_agent(self)
-            self.model.schedule.remove(self)
+        model.change_task(self, self.assign_task())
+
+        if self.next_death:
+            #print("Ape morta")
+            model.remove_agent(self)
+            return
+
+        # morta di vecchiaia o di fame in questo step: non fa più niente, la
+        # toglie dalla griglia l'evento di HiveModel.fire_events a fine step
+        if self.age > self.max_age or self.lifecredit <= 0:
             return
 
         if self.task == 'Forager':
             self.forage()
         elif self.task == 'Nurse':
-            self.lookaround()
-            # solo le nurse si muovono per andare a cercare le larve
-            self.movearound()
+            if self.next_larva is not None:
+                self.feed_larvae(self.next_larva)
+            if model.batch_moves:
+                model.moving_nurses.append(self)
+            else:
+                self.movearound(self.next_move)
         elif self.task == "Guard":
             self.guard_hive()
-        
 
     def lookaround(self):
-        if self.pos is None:
-            return
-        neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False)
-        for neighbor in neighbors:
-            if isinstance(neighbor, Larvae):
-                # Feed the larvae if it's not already matured
-                if not neighbor.matured:
-                    self.feed_larvae(neighbor)
-                    return
+        # invece di get_neighbors + isinstance guardiamo la mappa delle larve
+        # non ancora maturate nelle 8 celle attorno all'ape
+        x, y = self.model.neighbors.cells(self.pos)
+        hits = self.model.larvae_map[x, y]
+        if hits.any():
+            i = hits.argmax()
+            return self.model.larvae_at((int(x[i]), int(y[i])))
+        return None
     
-    def movearound(self):
-        if self.pos is None:
-            return
-
-        possible_steps = self.model.grid.get_neighborhood(self.pos, moore=True, include_center=False)
-        new_position = self.random.choice(possible_steps)
+    def movearound(self, new_position):
         if self.model.grid.is_cell_empty(new_position):
-            self.model.grid.move_agent(self, new_position)
-        return
+            self.model.move_agent(self, new_position)
 
     def guard_hive(self):
-        if self.pos is None:  
-            return  
-
-        threat_level = self.random.random()
+        threat_level = self.next_roll
         if threat_level > 0.8:
-            self.model.grid.remove_agent(self) 
-            self.model.schedule.remove(self) 
-            return
+            self.model.remove_agent(self)
         
     def feed(self):
         if self.model.hive_resources > 0:
@@ -123,55 +178,64 @@ class Bee(Agent):
             self.lifecredit = 3
         else:
             self.lifecredit -= 1
-            if self.pos is not None and self.lifecredit == 0:
-                #print("Ape morta")
-                self.model.grid.remove_agent(self)
-                self.model.schedule.remove(self)
-                return
+            if self.lifecredit == 2:
+                # primo step senza cibo: se non mangia più muore quando
+                # lifecredit arriva a 0, se invece mangia l'evento va a vuoto
+                self.model.post_event(self.model.schedule.steps + 1 + self.lifecredit, 'starve', self)
   
     def forage(self):
-        if self.random.random() < 0.1 and self.pos is not None:
+        if self.next_roll < 0.1:
             #print("Ape morta prendendo cibo")
-            self.model.grid.remove_agent(self)
-            self.model.schedule.remove(self)
-            return
-        elif self.model.hive_resources <= self.model.maxresource and self.pos is not None:
-            self.model.hive_resources += random.randint(1, 8)
+            self.model.remove_agent(self)
+        elif self.model.hive_resources <= self.model.maxresource:
+            # tetto controllato qui, dopo i raccolti delle forager attivate prima
+            self.model.hive_resources += self.next_gain
     
     def feed_larvae(self, larvae):
+        # un'altra nurse l'ha già fatta nascere in questo step
+        if larvae.matured:
+            return
         if self.model.hive_resources > 2 and self.model.larvae_count > 0:
             self.model.hive_resources -= 3
-            if not larvae.matured:
-                larvae.matured = True
-                self.model.create_new_bee(larvae)
-                return
+            larvae.matured = True
+            self.model.create_new_bee(larvae)
 
 class QueenBee(Agent):
+    dead = False
+
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
         self.age = 0
-        self.laying_rate = model_params['laying_rate']
+        self.laying_rate = default_params['laying_rate']
         self.max_age = 1000
 
     def lay_eggs(self):
-        if self.model.datacollector.model_vars['Nurse'][-1] > 0:
-            if self.model.datacollector.model_vars['Resource'][-1] > 0:
+        # stato attuale della colonia, non l'ultima riga del datacollector
+        if self.model.count_nurses() > 0:
+            if self.model.count_resources() > 0:
             
             #if self.model.datacollector.model_vars['Nurse'][-1] > 0:
                 #print("numero di nurse nel datacollector: ", self.model.datacollector.model_vars['Nurse'][-1])
-                for _ in range(self.laying_rate):
+                rolls = model_uniforms(self.model.key, self.model.schedule.steps, LAY, self.laying_rate)
+                for u in rolls.tolist():
+                    pos = self.model.random_free_cell(u)
+                    if pos is None:
+                        # alveare pieno, la regina non ha dove deporre
+                        return
                     new_larvae = Larvae(self.model.next_id(), self.model)
                     self.model.schedule.add(new_larvae)
-                    x = random.randrange(self.model.grid.width)
-                    y = random.randrange(self.model.grid.height)
-                    while(is_position_taken(self.model, (x, y))):
-                        x = random.randrange(self.model.grid.width)
-                        y = random.randrange(self.model.grid.height)
-                    self.model.grid.place_agent(new_larvae, (x, y))
-                    self.model.larvae_list.append(new_larvae)
+                    self.model.place_agent(new_larvae, pos)
+                    self.model.larvae_map[pos] = True
                     self.model.larvae_count += 1
+                    self.model.totalbees['Larvae'] += 1
 
     def step(self):
+        # la regina non ha niente da preparare, fa tutto in advance()
+        pass
+
+    def advance(self):
+        if self.dead:
+            return
         if self.model.hive_resources > 0:
             self.age += 1
             self.model.hive_resources -= 1
@@ -179,8 +243,7 @@ class QueenBee(Agent):
         if self.age <= self.max_age:
             self.lay_eggs()
         else:
-            self.model.grid.remove_agent(self)
-            self.model.schedule.remove(self)
+            self.model.remove_agent(self)
 
 '''class ResourcePatch(Agent):
     def __init__(self, unique_id, model, resource_amount):
@@ -192,8 +255,22 @@ class QueenBee(Agent):
         self.resource_amount = min(self.resource_amount, self.model.max_resource_amount)'''
 
 class HiveModel(Model):
-    def __init__(self, N, width, height, num_resources, percentage_foragers, percentage_nurses, percentage_guards, laying_rate ):
+    def __new__(cls, *args, seed=None, **kwargs):
+        # mesa passerebbe seed a random.Random (niente liste di int): il suo
+        # self.random non lo usa nessuna estrazione, il seed va solo a counter_rng
+        return super().__new__(cls, *args, **kwargs)
+
+    def __init__(self, N, width, height, num_resources, percentage_foragers, percentage_nurses, percentage_guards, laying_rate, planned_steps=100, collect_policy=None, batch_moves=True, seed=None):
         super().__init__()
+        # parametri della run, come in default_params (checkpoint e cache)
+        self.params = dict(N=N, width=width, height=height, num_resources=num_resources,
+                           percentage_foragers=percentage_foragers, percentage_nurses=percentage_nurses,
+                           percentage_guards=percentage_guards, laying_rate=laying_rate)
+        # le estrazioni casuali sono funzioni di (seed, id, step), vedi counter_rng
+        self.entropy = seed_entropy(seed)
+        self.key = seed_key(self.entropy)
+        # uniformi dello step per ogni ape, unique_id -> [4 numeri]
+        self.draws = {}
         self.num_bees = N
         self.grid = MultiGrid(width, height, True)
         self.schedule = SimultaneousActivation(self)
@@ -202,9 +279,30 @@ class HiveModel(Model):
         self.hive_resources = num_resources
         self.larvae_count = 0
         self.adult_bees_count = 0
-        self.larvae_list = []  
         self.larvae_maturity_threshold = 1 
 
+        # celle vuote della griglia: lista + posizione nella lista, per estrarre
+        # una cella libera a caso e aggiornarla con swap-remove in O(1)
+        self.free_cells = [(x, y) for x in range(width) for y in range(height)]
+        self.free_index = {pos: i for i, pos in enumerate(self.free_cells)}
+
+        # larvae_map[x, y] è True se nella cella c'è una larva non ancora maturata.
+        # le nurse cercano solo attorno a sé (lookaround), quindi qui non serve
+        # la BroodPool di beehive_base.py: basta la mappa
+        self.larvae_map = np.zeros((width, height), dtype=bool)
+        # vicini di ogni cella calcolati una volta sola, la griglia non cambia forma
+        self.neighbors = NeighborhoodTable(width, height)
+        # numero di agenti in ogni cella, per controllare tante celle vuote in una volta
+        self.occupancy = np.zeros((width, height), dtype=np.int32)
+
+        self.batch_moves = batch_moves
+        self.moving_nurses = []
+
+        # calendario delle morti annunciate: step -> [(tipo, ape)]
+        self.events = {}
+        # agenti morti durante lo step, tolti tutti insieme da commit_removals
+        self.removed = []
+
         # piccolo check del numero di apine iniziali lollino
         if (percentage_foragers + percentage_nurses + percentage_guards) > 1:
             print("La somma delle percentuali delle api non è 1. Foragers ", percentage_foragers, " nurses ", percentage_nurses," guards",  percentage_guards)
@@ -223,37 +321,20 @@ class HiveModel(Model):
         self.queen = QueenBee(self.next_id(), self)
         self.queen.laying_rate = laying_rate
         self.schedule.add(self.queen)
-        self.grid.place_agent(self.queen, (width // 2, height // 2))
-
-        for _ in range(self.num_of_foragers):
-            bee = Bee(self.next_id(), self, task="Forager")
+        self.place_agent(self.queen, (width // 2, height // 2))
+
+        # stesso ordine di sempre: foragers, nurses, guards
+        tasks = ['Forager'] * self.num_of_foragers + ['Nurse'] * self.num_of_nurses + ['Guard'] * self.num_of_guards
+        births = self.birth_uniforms(range(self.current_id + 1, self.current_id + 1 + len(tasks)))
+        cells = model_uniforms(self.key, 0, PLACE, len(tasks)).tolist()
+        for task, birth, u in zip(tasks, births, cells):
+            bee = Bee(self.next_id(), self, task=task, birth=birth)
             self.schedule.add(bee)
-            x = random.randrange(self.grid.width)
-            y = random.randrange(self.grid.height)
-            while(is_position_taken(self, (x, y))):
-                    x = random.randrange(self.grid.width)
-                    y = random.randrange(self.grid.height)
-            self.grid.place_agent(bee, (x, y))
-
-        for _ in range(self.num_of_nurses):
-            bee = Bee(self.next_id(), self, task="Nurse")
-            self.schedule.add(bee)
-            x = random.randrange(self.grid.width)
-            y = random.randrange(self.grid.height)
-            while(is_position_taken(self, (x, y))):
-                    x = random.randrange(self.grid.width)
-                    y = random.randrange(self.grid.height)  
-            self.grid.place_agent(bee, (x, y))
-
-        for _ in range(self.num_of_guards):
-            bee = Bee(self.next_id(), self, task="Guard")
-            self.schedule.add(bee)
-            x = random.randrange(self.grid.width)
-            y = random.randrange(self.grid.height)
-            while(is_position_taken(self, (x, y))):
-                    x = random.randrange(self.grid.width)
-                    y = random.randrange(self.grid.height)  
-            self.grid.place_agent(bee, (x, y))
+            self.totalbees[task] += 1
+            pos = self.random_free_cell(u)
+            if pos is None:
+                raise ValueError("La griglia è piena, non c'è posto per %d api" % self.num_bees)
+            self.place_agent(bee, pos)
 
         '''# Create resource patches
         for _ in range(num_resources):
@@ -263,61 +344,178 @@ class HiveModel(Model):
             y = random.randrange(self.grid.height)
             self.grid.place_agent(resource, (x, y))'''
 
-        self.datacollector = DataCollector(
-            model_reporters=
-            {
-                'Nurse': lambda m: m.count_agents_by_task()['Nurse'],
-                'Guard': lambda m: m.count_agents_by_task()['Guard'],
-                'Forager': lambda m: m.count_agents_by_task()['Forager'],
-                'Larvae': lambda m: m.count_agents_by_task()['Larvae'],
-                'Resource': lambda m: m.count_resources()
-            }
-        )
+        # censimento in colonne numpy preallocate per planned_steps step
+        self.datacollector = CensusCollector(planned_steps)
+        self.collect_policy = collect_policy or CollectionPolicy()
 
         self.datacollector.collect(self)
+        self.collect_policy.start(self)
                 
     def next_id(self):
         self.current_id += 1
         return self.current_id
+
+    def birth_uniforms(self, ids):
+        return uniforms(self.key, np.fromiter(ids, dtype=np.int64), 0, BIRTH).tolist()
+
+    def prepare_draws(self):
+        # tutte le api dello step in una sola chiamata a Philox
+        ids = [agent.unique_id for agent in self.schedule.agents if isinstance(agent, Bee)]
+        draws = uniforms(self.key, np.array(ids, dtype=np.int64), self.schedule.steps, STEP)
+        self.draws = dict(zip(ids, draws.tolist()))
     
     def create_new_bee(self, larvae):
         #print("SONO NATAAAAAA")
         new_bee = Bee(self.next_id(), self, task="Nurse")
         self.schedule.add(new_bee)
+        self.totalbees['Nurse'] += 1
         
-        x = random.randrange(self.grid.width)
-        y = random.randrange(self.grid.height)
-        self.grid.place_agent(new_bee, larvae.pos)
-        self.grid.remove_agent(larvae)
-        self.schedule.remove(larvae)
+        pos = larvae.pos
+        self.remove_agent(larvae)
+        self.larvae_map[pos] = False
+        self.place_agent(new_bee, pos)
 
-        self.larvae_list.remove(larvae)
         self.larvae_count -= 1
+        self.totalbees['Larvae'] -= 1
+
+    def larvae_at(self, pos):
+        for agent in self.grid.get_cell_list_contents([pos]):
+            if isinstance(agent, Larvae):
+                return agent
+
+    def change_task(self, bee, task):
+        # aggiorna il censimento solo quando l'ape cambia davvero compito
+        if bee.task != task:
+            self.totalbees[bee.task] -= 1
+            self.totalbees[task] += 1
+            bee.task = task
+
+    def remove_agent(self, agent):
+        # tutte le morti passano da qui, così totalbees resta sempre aggiornato.
+        # l'agente viene solo segnato come morto: griglia e scheduler si
+        # aggiornano a fine step in commit_removals
+        if agent.dead:
+            return
+        agent.dead = True
+        if isinstance(agent, Bee):
+            self.totalbees[agent.task] -= 1
+        self.removed.append(agent)
+
+    def commit_removals(self):
+        if not self.removed:
+            return
+        positions = [agent.pos for agent in self.removed]
+        for agent in self.removed:
+            self.grid.remove_agent(agent)
+            self.schedule.remove(agent)
+        self.removed = []
+        x, y = np.array(positions).T
+        np.subtract.at(self.occupancy, (x, y), 1)
+        for pos in set(positions):
+            self.update_free_cell(pos)
+
+    def place_agent(self, agent, pos):
+        self.grid.place_agent(agent, pos)
+        self.occupancy[pos] += 1
+        self.update_free_cell(pos)
+
+    def move_agent(self, agent, pos):
+        old_pos = agent.pos
+        self.grid.move_agent(agent, pos)
+        self.occupancy[old_pos] -= 1
+        self.occupancy[pos] += 1
+        self.update_free_cell(old_pos)
+        self.update_free_cell(pos)
+
+    def move_nurses(self):
+        '''
+        passo casuale di tutte le nurse dello step in una volta: ognuna sceglie
+        una delle 8 celle attorno, si sposta solo se la cella era vuota a inizio
+        fase e se due nurse scelgono la stessa cella vince la prima attivata.
+        '''
+        nurses = [bee for bee in self.moving_nurses if bee.pos is not None]
+        self.moving_nurses = []
+        if not nurses:
+            return
+
+        pos = np.array([bee.pos for bee in nurses])
+        table_x, table_y = self.neighbors.x[1], self.neighbors.y[1]
+        # la stessa uniforme di spostamento che userebbe Bee.step senza batch_moves
+        move = np.array([self.draws[bee.unique_id][3] for bee in nurses])
+        choice = (move * table_x.shape[2]).astype(np.int64)
+        x = table_x[pos[:, 0], pos[:, 1], choice].astype(np.int64)
+        y = table_y[pos[:, 0], pos[:, 1], choice].astype(np.int64)
+
+        ok = np.flatnonzero(self.occupancy[x, y] == 0)
+        _, first = np.unique(x[ok] * self.grid.height + y[ok], return_index=True)
+        for i in ok[np.sort(first)]:
+            self.move_agent(nurses[i], (int(x[i]), int(y[i])))
+
+    def update_free_cell(self, pos):
+        empty = self.grid.is_cell_empty(pos)
+        if empty and pos not in self.free_index:
+            self.free_index[pos] = len(self.free_cells)
+            self.free_cells.append(pos)
+        elif not empty and pos in self.free_index:
+            # swap-remove: l'ultima cella prende il posto di quella occupata
+            i = self.free_index.pop(pos)
+            last = self.free_cells.pop()
+            if i < len(self.free_cells):
+                self.free_cells[i] = last
+                self.free_index[last] = i
+
+    def random_free_cell(self, u):
+        # cella libera scelta dall'uniforme u, None se la griglia è piena
+        if not self.free_cells:
+            return None
+        return self.free_cells[int(u * len(self.free_cells))]
+
+    def post_event(self, step, kind, bee):
+        # mai nel passato: al più presto alla fine dello step in corso
+        step = max(step, self.schedule.steps + 1)
+        self.events.setdefault(step, []).append((kind, bee))
+
+    def fire_events(self):
+        '''
+        a fine step toglie le api con un evento in scadenza. Le api morte di
+        vecchiaia o di fame hanno già smesso di agire in advance(), qui si
+        tolgono senza passare tutte le api. Gli eventi sono stime: se l'ape ha
+        saltato dei pasti non è ancora abbastanza vecchia e la pensione viene
+        ripostata, se ha ripreso a mangiare lifecredit è tornato a 3 e la fame
+        non fa niente. Ripostando dall'età attuale l'evento cade proprio nello
+        step in cui advance() trova l'ape scaduta.
+        '''
+        now = self.schedule.steps
+        for kind, bee in self.events.pop(now, ()):
+            if bee.dead:
+                continue
+            if kind == 'retire':
+                if bee.age > bee.max_age:
+                    self.remove_agent(bee)
+                else:
+                    self.post_event(now + bee.max_age + 1 - bee.age, 'retire', bee)
+            elif kind == 'starve' and bee.lifecredit <= 0:
+                self.remove_agent(bee)
 
     def count_resources(self):
         return self.hive_resources
+
+    def count_nurses(self):
+        return self.totalbees['Nurse']
     
     def count_agents_by_task(self):
-        self.totalbees['Nurse'] = 0
-        self.totalbees['Forager'] = 0
-        self.totalbees['Guard'] = 0
-        self.totalbees['Larvae'] = 0
-
-        for agent in self.schedule.agents:
-            if hasattr(agent, 'task'):
-                if agent.task == 'Nurse':
-                    self.totalbees['Nurse'] += 1
-                elif agent.task == 'Forager':
-                    self.totalbees['Forager'] += 1
-                elif agent.task == 'Guard':
-                    self.totalbees['Guard'] += 1
-            elif isinstance(agent, Larvae):
-                self.totalbees['Larvae'] += 1
+        # totalbees è aggiornato a ogni nascita, morte, deposizione e cambio di task
         return self.totalbees
     
     def step(self):
+        self.prepare_draws()
         self.schedule.step()
-        self.datacollector.collect(self)
+        self.fire_events()
+        self.commit_removals()
+        if self.batch_moves:
+            self.move_nurses()
+        if self.collect_policy.should_collect(self):
+            self.datacollector.collect(self)
                 
 def bee_portrayal(agent):
     if agent is None:
@@ -342,38 +540,45 @@ def bee_portrayal(agent):
         portrayal["Layer"] = 1
     return portrayal
 
-grid_width = 30
-grid_height = 30
-grid = CanvasGrid(bee_portrayal, grid_width, grid_height, 500, 500)
-
-task_chart = ChartModule(
-    [
-    {"Label": "Nurse", "Color": "blue"},
-    {"Label": "Guard", "Color": "red"},
-    {"Label": "Forager", "Color": "green"},
-    {"Label": "Larvae", "Color": "orange"},
-    {"Label": "Resource", "Color": "black"}
-     ],
-    data_collector_name='datacollector'
-)
-
-model_params = {
-    "N": Slider("Number of bees", 150, 5, 1000, 1), 
-    "width": Slider("Grid Width", 17, 5, 30, 1),
-    "height": Slider("Grid Height", 17, 5, 30, 1),
-    "num_resources": Slider("Resources", 450, 5, 1000, 1),
-    "percentage_foragers": Slider("{%} of foragers", 0.4, 0, 1 , 0.01), 
-    "percentage_nurses": Slider("{%} of nurses", 0.4, 0, 1, 0.01), 
-    "percentage_guards": Slider("{%} of guards", 0.2, 0, 1 , 0.01),
-    "laying_rate": Slider("Laying rate of queen bee", 10, 1, 50 , 1)
-}
-
-server = ModularServer(
-    HiveModel,
-    [grid, task_chart],
-    "Bee Hive Model",
-    model_params
-)
-
-server.port = 8521
-server.launch()
\ No newline at end of file
+if __name__ == '__main__':
+    # la visualizzazione serve solo quando si lancia il server,
+    # per le simulazioni senza browser vedi run_headless.py
+    from mesa.visualization.ModularVisualization import ModularServer
+    from mesa.visualization.modules import CanvasGrid, ChartModule
+    from mesa.visualization.UserParam import Slider
+
+    grid_width = 30
+    grid_height = 30
+    grid = CanvasGrid(bee_portrayal, grid_width, grid_height, 500, 500)
+
+    task_chart = ChartModule(
+        [
+        {"Label": "Nurse", "Color": "blue"},
+        {"Label": "Guard", "Color": "red"},
+        {"Label": "Forager", "Color": "green"},
+        {"Label": "Larvae", "Color": "orange"},
+        {"Label": "Resource", "Color": "black"}
+         ],
+        data_collector_name='datacollector'
+    )
+
+    model_params = {
+        "N": Slider("Number of bees", default_params["N"], 5, 1000, 1), 
+        "width": Slider("Grid Width", default_params["width"], 5, 30, 1),
+        "height": Slider("Grid Height", default_params["height"], 5, 30, 1),
+        "num_resources": Slider("Resources", default_params["num_resources"], 5, 1000, 1),
+        "percentage_foragers": Slider("{%} of foragers", default_params["percentage_foragers"], 0, 1 , 0.01), 
+        "percentage_nurses": Slider("{%} of nurses", default_params["percentage_nurses"], 0, 1, 0.01), 
+        "percentage_guards": Slider("{%} of guards", default_params["percentage_guards"], 0, 1 , 0.01),
+        "laying_rate": Slider("Laying rate of queen bee", default_params["laying_rate"], 1, 50 , 1)
+    }
+
+    server = ModularServer(
+        HiveModel,
+        [grid, task_chart],
+        "Bee Hive Model",
+        model_params
+    )
+
+    server.port = 8521
+    server.launch()
\ No newline at end of file
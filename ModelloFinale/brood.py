@@ -0,0 +1,42 @@
+from collections import deque
+
+
+class BroodPool:
+    '''
+    insieme delle larve non ancora maturate, in ordine di deposizione.
+    pop_next() restituisce la prossima larva da nutrire e retire() toglie una
+    larva maturata, entrambe in O(1) ammortizzato: le larve ritirate restano
+    nella deque e vengono scartate quando arrivano in testa.
+    '''
+
+    def __init__(self):
+        self.queue = deque()
+        self.members = {}
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, larvae):
+        return larvae.unique_id in self.members
+
+    def __iter__(self):
+        return iter(list(self.members.values()))
+
+    def add(self, larvae):
+        self.members[larvae.unique_id] = larvae
+        self.queue.append(larvae)
+
+    def retire(self, larvae):
+        self.members.pop(larvae.unique_id, None)
+        # se nessuno fa pop_next (modello lookaround) la deque si riempie di
+        # larve ritirate: ogni tanto la ricostruiamo, costo ammortizzato O(1)
+        if len(self.queue) > 2 * len(self.members) + 32:
+            self.queue = deque(l for l in self.queue if l.unique_id in self.members)
+
+    def pop_next(self):
+        # None se non ci sono larve da nutrire
+        while self.queue:
+            larvae = self.queue.popleft()
+            if self.members.pop(larvae.unique_id, None) is not None:
+                return larvae
+        return None
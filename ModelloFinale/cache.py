@@ -0,0 +1,141 @@
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # windows: niente lock, restano le scritture atomiche
+    fcntl = None
+
+'''
+cache su disco indirizzata per contenuto: la chiave è l'hash di tutto quello
+che determina il risultato (parametri, seed, step, sorgenti del modello), il
+valore un file nella cartella della cache. Quando la cartella supera
+max_bytes si cancellano i file usati meno di recente, fino a scendere al 90%.
+
+più processi (i worker di sweep.py ed ensemble.py) possono usare la stessa
+cartella: i file si scrivono in un temporaneo e poi si rinominano, e lock()
+evita che due worker calcolino la stessa chiave nello stesso momento. I file
+di lock (uno per ognuna delle LOCK_STRIPES strisce di chiavi, in locks/) non
+si cancellano mai, perché un altro processo potrebbe averli aperti; due lock()
+sulla stessa cartella non vanno annidati.
+'''
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(HERE, '.cache')
+
+# i file che decidono come evolve HiveModel e cosa finisce nel censimento: se
+# cambiano, cambiano le chiavi. CLI e script attorno (run_headless, sweep...) no
+MODEL_SOURCES = ('beehivemodel_modellofinale.py', 'census.py', 'counter_rng.py', 'neighborhood.py')
+# in più per le colonie di warmstart.py, salvate come checkpoint
+WARMSTART_SOURCES = MODEL_SOURCES + ('checkpoint.py', 'warmstart.py')
+
+
+LOCK_STRIPES = 256
+
+
+@functools.lru_cache(maxsize=None)
+def source_hash(files=MODEL_SOURCES):
+    # una volta per processo: i sorgenti non cambiano durante una run
+    digest = hashlib.sha256()
+    for name in files:
+        with open(os.path.join(HERE, name), 'rb') as file:
+            digest.update(name.encode())
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def cache_key(**parts):
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+# permessi dei file della cache, quelli di un file nuovo con la umask del
+# processo (mkstemp crea 0600). La umask si legge solo cambiandola, quindi una
+# volta sola all'import e non mentre altri thread potrebbero creare file
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes=1 << 30, suffix='.npz'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(os.path.join(directory, 'locks'), exist_ok=True)
+        # byte nella cartella secondo questo processo: si scandisce la cartella
+        # alla prima scrittura e poi solo quando la stima supera max_bytes
+        self.size = None
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def load(self, key, loader):
+        # loader(path) sul file della chiave, None se non c'è
+        path = self.path(key)
+        try:
+            value = loader(path)
+        except FileNotFoundError:
+            return None
+        # l'ora di modifica fa da "ultimo uso" per l'eviction
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return value
+
+    def store(self, key, saver):
+        # saver(path) scrive il file; chi legge vede il file vecchio o quello nuovo, mai metà
+        fd, tmp = tempfile.mkstemp(suffix=self.suffix, dir=self.directory)
+        os.close(fd)
+        try:
+            saver(tmp)
+            os.chmod(tmp, FILE_MODE)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, self.path(key))
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+        if self.size is not None:
+            self.size += size
+        if self.size is None or self.size > self.max_bytes:
+            self.evict()
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        if fcntl is None:
+            yield
+            return
+        # le chiavi sono esadecimali: le prime due cifre scelgono la striscia
+        stripe = int(key[:2], 16) % LOCK_STRIPES
+        with open(os.path.join(self.directory, 'locks', '%02x.lock' % stripe), 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def evict(self):
+        # scandisce la cartella (anche le scritture degli altri processi) e
+        # aggiorna la stima di store()
+        entries = []
+        for entry in os.scandir(self.directory):
+            # i temporanei di mkstemp iniziano con tmp, le chiavi sono esadecimali
+            if not entry.name.endswith(self.suffix) or entry.name.startswith('tmp'):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            # si scende sotto il 90% così la prossima scansione non è subito dopo
+            target = self.max_bytes * 9 // 10
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                total -= size
+        self.size = total
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+CENSUS_COLUMNS = ('Nurse', 'Guard', 'Forager', 'Larvae', 'Resource')
+
+
+class CensusColumn:
+    # colonna di CensusCollector: gli indici singoli restituiscono int python
+    # (il ChartModule li manda al browser in json), gli slice viste numpy
+    def __init__(self, collector, index):
+        self.collector = collector
+        self.index = index
+
+    def __len__(self):
+        return self.collector.length
+
+    def __getitem__(self, key):
+        value = self.collector.get_array()[key, self.index]
+        return value.item() if np.ndim(value) == 0 else value
+
+
+class CensusCollector:
+    '''
+    sostituto del DataCollector di mesa per il censimento di HiveModel: invece
+    di una lista python per reporter tiene una matrice numpy preallocata
+    (una riga per step, una colonna per Nurse/Guard/Forager/Larvae/Resource)
+    che raddoppia quando si riempie.
+
+    model_vars['Nurse'][-1] funziona come con il DataCollector, quindi la
+    regina e il ChartModule del server lo leggono senza modifiche.
+    '''
+
+    def __init__(self, steps=100):
+        # +1 perché il modello raccoglie anche lo stato iniziale
+        self.data = np.zeros((steps + 1, len(CENSUS_COLUMNS)), dtype=np.int64)
+        # step del modello di ogni riga, non sempre consecutivi (vedi CollectionPolicy)
+        self.steps = np.zeros(steps + 1, dtype=np.int64)
+        self.length = 0
+        self.model_vars = {name: CensusColumn(self, i) for i, name in enumerate(CENSUS_COLUMNS)}
+
+    def __len__(self):
+        return self.length
+
+    def collect(self, model):
+        if self.length == len(self.data):
+            grown = np.zeros((2 * len(self.data), len(CENSUS_COLUMNS)), dtype=np.int64)
+            grown[:self.length] = self.data
+            self.data = grown
+            grown_steps = np.zeros(len(grown), dtype=np.int64)
+            grown_steps[:self.length] = self.steps
+            self.steps = grown_steps
+
+        row = self.data[self.length]
+        row[0] = model.totalbees['Nurse']
+        row[1] = model.totalbees['Guard']
+        row[2] = model.totalbees['Forager']
+        row[3] = model.totalbees['Larvae']
+        row[4] = model.hive_resources
+        self.steps[self.length] = model.schedule.steps
+        self.length += 1
+
+    def get_array(self):
+        # vista sulle righe raccolte, nessuna copia
+        return self.data[:self.length]
+
+    def get_model_vars_dataframe(self):
+        index = pd.Index(self.steps[:self.length], name='step', copy=False)
+        return pd.DataFrame(self.get_array(), index=index, columns=list(CENSUS_COLUMNS), copy=False)
+
+
+class CollectionPolicy:
+    '''
+    decide a quale step HiveModel chiama datacollector.collect: di default ad
+    ogni step. Lo stato iniziale viene raccolto sempre, start() viene chiamato
+    subito dopo e should_collect() alla fine di ogni step.
+    '''
+
+    def start(self, model):
+        pass
+
+    def should_collect(self, model):
+        return True
+
+    def describe(self):
+        # configurazione della politica, entra nella chiave della cache dei risultati
+        return [type(self).__name__, vars(self)]
+
+
+class EveryKSteps(CollectionPolicy):
+    # k si conta dallo step 0 della run anche dopo un resume, così le righe
+    # sono le stesse della run mai interrotta
+    def __init__(self, k):
+        if k < 1:
+            raise ValueError("EveryKSteps: k deve essere almeno 1, non %r" % k)
+        self.k = k
+
+    def should_collect(self, model):
+        return model.schedule.steps % self.k == 0
+
+
+class FinalStep(CollectionPolicy):
+    # solo l'ultimo step della run (oltre allo stato iniziale): steps step dopo
+    # start(), quindi anche per una run ripresa da un checkpoint
+    def __init__(self, steps):
+        self.steps = steps
+        self.last = None
+
+    def describe(self):
+        # last è stato della run, non configurazione
+        return ['FinalStep', self.steps]
+
+    def start(self, model):
+        self.last = model.schedule.steps + self.steps
+
+    def should_collect(self, model):
+        return model.schedule.steps == self.last
+
+
+class OnEvents(CollectionPolicy):
+    '''
+    raccoglie solo quando succede qualcosa:
+    - thresholds: {'Guard': 0, 'Nurse': 20, ...}, quando il numero di api di
+      quel task passa sopra o sotto la soglia
+    - extinction: quando muore l'ultima ape operaia
+    - queen_death: quando muore la regina
+    '''
+
+    def __init__(self, thresholds=None, extinction=True, queen_death=True):
+        self.thresholds = thresholds or {}
+        self.extinction = extinction
+        self.queen_death = queen_death
+        self.previous = None
+
+    def _state(self, model):
+        counts = model.count_agents_by_task()
+        above = {task: counts[task] > value for task, value in self.thresholds.items()}
+        extinct = counts['Nurse'] + counts['Guard'] + counts['Forager'] == 0
+        return above, extinct, model.queen.pos is None
+
+    def describe(self):
+        # previous è stato della run, non configurazione
+        return ['OnEvents', self.thresholds, self.extinction, self.queen_death]
+
+    def start(self, model):
+        self.previous = self._state(model)
+
+    def should_collect(self, model):
+        above, extinct, queen_dead = self._state(model)
+        prev_above, prev_extinct, prev_queen_dead = self.previous
+        self.previous = (above, extinct, queen_dead)
+        return (above != prev_above
+                or (self.extinction and extinct and not prev_extinct)
+                or (self.queen_death and queen_dead and not prev_queen_dead))
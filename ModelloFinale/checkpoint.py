@@ -0,0 +1,139 @@
+import json
+import numpy as np
+from mesa import Agent
+from beehivemodel_modellofinale import HiveModel, Bee, Larvae
+from census import CENSUS_COLUMNS
+
+'''
+checkpoint di HiveModel in un .npz compresso, da salvare e ricaricare tra
+uno step e l'altro: api (età, JH, lifecredit, task, posizione), larve,
+regina, risorse, calendario delle morti, ordine delle celle libere,
+censimento e seed. I numeri casuali dipendono solo da (seed, id, step), vedi
+counter_rng, quindi non c'è stato di generatori da salvare (nemmeno quello di
+model.random di mesa, che nessuna estrazione usa). Una run ripresa
+da un checkpoint va avanti identica a quella mai interrotta.
+
+    model = load_checkpoint('step300.npz')
+
+la politica di raccolta del censimento non si salva: va ripassata a
+load_checkpoint (di default si raccoglie ogni step).
+'''
+
+EVENT_KINDS = ('retire', 'starve')
+
+
+def save_checkpoint(model, path):
+    agents = model.schedule.agents
+    bees = [agent for agent in agents if isinstance(agent, Bee)]
+    larvae = [agent for agent in agents if isinstance(agent, Larvae)]
+    queen = model.queen
+    live = set(id(bee) for bee in bees)
+    events = [(step, EVENT_KINDS.index(kind), bee.unique_id)
+              for step, bucket in model.events.items()
+              for kind, bee in bucket if id(bee) in live]
+
+    arrays = dict(
+        params=json.dumps(model.params),
+        batch_moves=model.batch_moves,
+        # entropia del seed (int o lista di int) in json, vedi counter_rng.seed_entropy
+        seed=json.dumps(model.entropy),
+        # scalari del modello
+        hive_resources=model.hive_resources,
+        maxresource=model.maxresource,
+        larvae_count=model.larvae_count,
+        adult_bees_count=model.adult_bees_count,
+        current_id=model.current_id,
+        steps=model.schedule.steps,
+        time=model.schedule.time,
+        totalbees=np.array([model.totalbees[task] for task in CENSUS_COLUMNS[:4]]),
+        # ordine dello scheduler, conta per i conflitti in advance()
+        order=np.array([agent.unique_id for agent in agents], dtype=np.int64),
+        bee_id=np.array([bee.unique_id for bee in bees], dtype=np.int64),
+        bee_age=np.array([bee.age for bee in bees], dtype=np.int64),
+        bee_JH=np.array([bee.JH_level for bee in bees], dtype=np.float64),
+        bee_lifecredit=np.array([bee.lifecredit for bee in bees], dtype=np.int64),
+        bee_task=np.array([bee.task for bee in bees], dtype='U7'),
+        bee_pos=np.array([bee.pos for bee in bees], dtype=np.int64).reshape(-1, 2),
+        larvae_id=np.array([larva.unique_id for larva in larvae], dtype=np.int64),
+        larvae_matured=np.array([larva.matured for larva in larvae], dtype=bool),
+        larvae_pos=np.array([larva.pos for larva in larvae], dtype=np.int64).reshape(-1, 2),
+        queen=np.array([queen.unique_id, queen.age, queen.laying_rate, queen.max_age], dtype=np.int64),
+        queen_pos=np.array(queen.pos if queen.pos is not None else (-1, -1), dtype=np.int64),
+        queen_dead=queen.dead,
+        free_cells=np.array(model.free_cells, dtype=np.int64).reshape(-1, 2),
+        events=np.array(events, dtype=np.int64).reshape(-1, 3),
+        census=model.datacollector.get_array(),
+        census_steps=model.datacollector.steps[:model.datacollector.length],
+        census_capacity=len(model.datacollector.data),
+    )
+    np.savez_compressed(path, **arrays)
+
+
+def load_checkpoint(path, collect_policy=None):
+    with np.load(path, allow_pickle=False) as data:
+        data = dict(data)
+    params = json.loads(str(data['params']))
+
+    # modello vuoto con gli stessi parametri: solo la regina, che spostiamo
+    model = HiveModel(**dict(params, N=0), planned_steps=int(data['census_capacity']) - 1,
+                      collect_policy=collect_policy, batch_moves=bool(data['batch_moves']),
+                      seed=json.loads(str(data['seed'])))
+    model.params = params
+    model.num_bees = params['N']
+    model.num_of_foragers = int(params['N'] * params['percentage_foragers'])
+    model.num_of_nurses = int(params['N'] * params['percentage_nurses'])
+    model.num_of_guards = int(params['N'] * params['percentage_guards'])
+    queen = model.queen
+    model.grid.remove_agent(queen)
+    model.schedule.remove(queen)
+    model.occupancy[:] = 0
+    model.events = {}
+
+    agents = {}
+    for i, unique_id in enumerate(data['bee_id'].tolist()):
+        bee = Bee.__new__(Bee)
+        Agent.__init__(bee, unique_id, model)
+        bee.task = str(data['bee_task'][i])
+        bee.age = int(data['bee_age'][i])
+        bee.JH_level = float(data['bee_JH'][i])
+        bee.lifecredit = int(data['bee_lifecredit'][i])
+        bee.staged = False
+        agents[unique_id] = (bee, tuple(data['bee_pos'][i].tolist()))
+    for i, unique_id in enumerate(data['larvae_id'].tolist()):
+        larva = Larvae(unique_id, model)
+        larva.matured = bool(data['larvae_matured'][i])
+        agents[unique_id] = (larva, tuple(data['larvae_pos'][i].tolist()))
+    queen.unique_id, queen.age, queen.laying_rate, queen.max_age = data['queen'].tolist()
+    queen.dead = bool(data['queen_dead'])
+    if not queen.dead:
+        agents[queen.unique_id] = (queen, tuple(data['queen_pos'].tolist()))
+
+    for unique_id in data['order'].tolist():
+        agent, pos = agents[unique_id]
+        model.schedule.add(agent)
+        model.grid.place_agent(agent, pos)
+        model.occupancy[pos] += 1
+        if isinstance(agent, Larvae) and not agent.matured:
+            model.larvae_map[pos] = True
+
+    model.free_cells = [tuple(cell) for cell in data['free_cells'].tolist()]
+    model.free_index = {pos: i for i, pos in enumerate(model.free_cells)}
+    for step, kind, unique_id in data['events'].tolist():
+        model.events.setdefault(step, []).append((EVENT_KINDS[kind], agents[unique_id][0]))
+
+    model.hive_resources = int(data['hive_resources'])
+    model.maxresource = int(data['maxresource'])
+    model.larvae_count = int(data['larvae_count'])
+    model.adult_bees_count = int(data['adult_bees_count'])
+    model.current_id = int(data['current_id'])
+    model.schedule.steps = int(data['steps'])
+    model.schedule.time = data['time'].item()
+    model.totalbees = dict(zip(CENSUS_COLUMNS[:4], data['totalbees'].tolist()))
+
+    collector = model.datacollector
+    collector.length = len(data['census'])
+    collector.data[:collector.length] = data['census']
+    collector.steps[:collector.length] = data['census_steps']
+
+    model.collect_policy.start(model)
+    return model
@@ -0,0 +1,83 @@
+import hashlib
+import numpy as np
+
+'''
+numeri casuali "a contatore" per i due motori dell'alveare (HiveModel e
+VectorHiveModel): invece di un generatore con uno stato che avanza, ogni
+numero è una funzione pura di (seed, id dell'agente, step, stream), calcolata
+con Philox4x32-10 (Random123) vettorizzato in NumPy. La chiave è (seed, id),
+il contatore (step, stream, blocco, 0) e ogni blocco dà quattro uniformi.
+
+così le estrazioni di un'ape non dipendono dall'ordine di attivazione né dal
+processo che la esegue, tutte le api di uno step si estraggono con una sola
+chiamata e un checkpoint deve salvare solo il seed.
+
+    key = seed_key(42)
+    u = uniforms(key, ids, step, STEP)     # shape (len(ids), 4)
+'''
+
+# stream del contatore
+BIRTH = 0   # età e JH iniziali di un'ape (l'id basta, lo step è sempre 0)
+STEP = 1    # uno per step: [guardiane assenti, rischio del task, raccolto, spostamento]
+PLACE = 2   # celle delle api iniziali
+LAY = 3     # celle delle uova della regina
+
+# id delle estrazioni del modello, gli agenti partono da 1
+MODEL_ID = 0
+
+_M0 = np.uint64(0xD2511F53)
+_M1 = np.uint64(0xCD9E8D57)
+_W0 = np.uint64(0x9E3779B9)
+_W1 = np.uint64(0xBB67AE85)
+_MASK = np.uint64(0xFFFFFFFF)
+_SHIFT = np.uint64(32)
+
+
+def seed_entropy(seed):
+    '''
+    entropia di SeedSequence per un seed qualunque, in tipi python (int o
+    lista di int) così si salva in json: None ne estrae una a caso, stringhe
+    e bytes passano da sha256, int e liste di int restano come sono.
+    '''
+    if isinstance(seed, str):
+        seed = seed.encode()
+    if isinstance(seed, (bytes, bytearray)):
+        return int.from_bytes(hashlib.sha256(seed).digest(), 'little')
+    entropy = np.random.SeedSequence(seed).entropy
+    if isinstance(entropy, (int, np.integer)):
+        return int(entropy)
+    return [int(value) for value in entropy]
+
+
+def seed_key(entropy):
+    # 32 bit di chiave da qualunque seed accettato da SeedSequence
+    return int(np.random.SeedSequence(entropy).generate_state(1)[0])
+
+
+def philox4x32(counter, key, rounds=10):
+    '''
+    counter: 4 parole da 32 bit, key: 2 parole, scalari o array (broadcast).
+    Restituisce le 4 parole di uscita come array uint64 < 2**32.
+    '''
+    c0, c1, c2, c3 = (np.asarray(word, dtype=np.uint64) for word in counter)
+    k0, k1 = (np.asarray(word, dtype=np.uint64) for word in key)
+    for _ in range(rounds):
+        # prodotti 32x32 -> 64 bit, esatti in uint64
+        p0 = c0 * _M0
+        p1 = c2 * _M1
+        c0, c1, c2, c3 = (p1 >> _SHIFT) ^ c1 ^ k0, p1 & _MASK, (p0 >> _SHIFT) ^ c3 ^ k1, p0 & _MASK
+        k0 = (k0 + _W0) & _MASK
+        k1 = (k1 + _W1) & _MASK
+    return np.broadcast_arrays(c0, c1, c2, c3)
+
+
+def uniforms(key, ids, step, stream, block=0):
+    # quattro uniformi in [0, 1) per ogni id (o blocco): shape (..., 4)
+    words = philox4x32((step, stream, block, 0), (key, ids))
+    return np.stack(words, axis=-1) * 2.0 ** -32
+
+
+def model_uniforms(key, step, stream, n):
+    # n uniformi del modello per questo step, a blocchi di quattro
+    blocks = np.arange((n + 3) // 4)
+    return uniforms(key, MODEL_ID, step, stream, blocks).ravel()[:n]
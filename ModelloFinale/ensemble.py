@@ -0,0 +1,84 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from beehivemodel_modellofinale import default_params
+from census import CENSUS_COLUMNS
+from run_headless import run_model
+
+'''
+ensemble di repliche di HiveModel: stesso set di parametri, M seed
+indipendenti, tutte le run su un pool di processi. Una traiettoria sola è
+troppo rumorosa (morti casuali di guardiane e foraggere), qui per ogni step e
+per ogni colonna del censimento escono media, deviazione standard, quantili e
+banda di confidenza della media.
+
+    python ensemble.py --replicates 50 --steps 300 --laying_rate 5 --output ensemble.csv
+'''
+
+
+def replicate_seeds(seed, replicates):
+    # seed indipendenti ricavati da un'unica SeedSequence
+    children = np.random.SeedSequence(seed).spawn(replicates)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def _run_replicate(seed, params, steps):
+    census = run_model(params, steps=steps, seed=seed)
+    return census.index.to_numpy(), census.to_numpy()
+
+
+def run_ensemble(params=None, replicates=10, steps=100, seed=0, workers=None):
+    # restituisce step, array (repliche, step, colonne) e seed usati
+    seeds = replicate_seeds(seed, replicates)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_replicate, seeds, itertools.repeat(params), itertools.repeat(steps)))
+    index = results[0][0]
+    runs = np.stack([data for _, data in results])
+    return index, runs, seeds
+
+
+def summarize(index, runs, quantiles=(0.05, 0.5, 0.95), confidence=0.95):
+    '''
+    una riga per step, colonne (censimento, statistica): mean, std, ci_low e
+    ci_high (banda di confidenza della media, approssimazione normale) e un
+    q<percentuale> per ogni quantile, es. summary['Nurse']['q50'].
+    '''
+    runs = runs.astype(float)
+    mean = runs.mean(axis=0)
+    std = runs.std(axis=0, ddof=1) if len(runs) > 1 else np.zeros_like(mean)
+    half = NormalDist().inv_cdf(0.5 + confidence / 2) * std / np.sqrt(len(runs))
+    stats = {'mean': mean, 'std': std, 'ci_low': mean - half, 'ci_high': mean + half}
+    for q, values in zip(quantiles, np.quantile(runs, quantiles, axis=0)):
+        stats['q%g' % (100 * q)] = values
+
+    columns = {(name, stat): values[:, i]
+               for i, name in enumerate(CENSUS_COLUMNS)
+               for stat, values in stats.items()}
+    return pd.DataFrame(columns, index=pd.Index(index, name='step'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ensemble di repliche di HiveModel")
+    parser.add_argument("--replicates", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--quantiles", default="0.05,0.5,0.95")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--output", default="ensemble.csv")
+    for name, value in default_params.items():
+        parser.add_argument("--" + name, type=type(value), default=value)
+    args = parser.parse_args()
+
+    params = {name: getattr(args, name) for name in default_params}
+    index, runs, _ = run_ensemble(params, replicates=args.replicates, steps=args.steps,
+                                  seed=args.seed, workers=args.workers)
+    summary = summarize(index, runs, quantiles=[float(q) for q in args.quantiles.split(',')],
+                        confidence=args.confidence)
+    summary.columns = ['%s_%s' % column for column in summary.columns]
+    summary.to_csv(args.output)
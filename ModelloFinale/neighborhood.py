@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def moore_offsets(radius=1):
+    # stesso ordine di MultiGrid.get_neighborhood(moore=True, include_center=False)
+    return np.array([(dx, dy)
+                     for dx in range(-radius, radius + 1)
+                     for dy in range(-radius, radius + 1)
+                     if (dx, dy) != (0, 0)])
+
+
+class NeighborhoodTable:
+    '''
+    vicinati di Moore sul toro precalcolati per ogni cella della griglia.
+    x[r][cx, cy] e y[r][cx, cy] sono le coordinate delle celle attorno a
+    (cx, cy) con raggio r, già "arrotolate" sui bordi: la griglia non cambia
+    mai forma durante una run, quindi i conti si fanno una volta sola.
+
+    i raggi non calcolati nel costruttore vengono costruiti al primo uso.
+    '''
+
+    def __init__(self, width, height, radii=(1,)):
+        self.width = width
+        self.height = height
+        self.x = {}
+        self.y = {}
+        for radius in radii:
+            self.build(radius)
+
+    def build(self, radius):
+        if 2 * radius + 1 > min(self.width, self.height):
+            raise ValueError("griglia %dx%d troppo piccola per raggio %d" % (self.width, self.height, radius))
+        offsets = moore_offsets(radius)
+        dtype = np.min_scalar_type(max(self.width, self.height))
+        xs = (np.arange(self.width)[:, None, None] + offsets[:, 0]) % self.width
+        ys = (np.arange(self.height)[None, :, None] + offsets[:, 1]) % self.height
+        shape = (self.width, self.height, len(offsets))
+        self.x[radius] = np.broadcast_to(xs, shape).astype(dtype)
+        self.y[radius] = np.broadcast_to(ys, shape).astype(dtype)
+
+    def cells(self, pos, radius=1):
+        # array delle x e delle y dei vicini di pos
+        if radius not in self.x:
+            self.build(radius)
+        return self.x[radius][pos], self.y[radius][pos]
+
+    def neighborhood(self, pos, radius=1):
+        # come grid.get_neighborhood: lista di tuple, ricavata dalle tabelle
+        # senza tenerne una per cella (sulle griglie grandi costerebbe troppo)
+        x, y = self.cells(pos, radius)
+        return list(zip(x.tolist(), y.tolist()))
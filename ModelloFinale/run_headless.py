@@ -0,0 +1,129 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from beehivemodel_modellofinale import HiveModel, default_params
+from cache import CACHE_DIR, MODEL_SOURCES, WARMSTART_SOURCES, DiskCache, cache_key, source_hash
+from census import CENSUS_COLUMNS, EveryKSteps, FinalStep, OnEvents
+from checkpoint import load_checkpoint, save_checkpoint
+from warmstart import apply_params, warm_start
+
+'''
+lancia HiveModel senza ModularServer: stessi parametri di model_params,
+numero di step e seed, e salva il censimento (Nurse/Guard/Forager/Larvae/Resource)
+step per step in un csv.
+
+    python run_headless.py --steps 300 --seed 1 --laying_rate 5 --output run.csv
+
+con --checkpoint salva lo stato finale, con --resume riparte da un checkpoint
+(parametri e seed sono quelli salvati) e fa altri --steps step:
+
+    python run_headless.py --steps 300 --seed 1 --checkpoint step300.npz
+    python run_headless.py --steps 100 --resume step300.npz --output dopo300.csv
+
+le run con seed finiscono in una cache su disco (ModelloFinale/.cache/results)
+con chiave sorgenti del modello, parametri, seed, step e politica di raccolta:
+rilanciare la stessa run restituisce subito il censimento salvato.
+'''
+
+RESULTS_DIR = os.path.join(CACHE_DIR, 'results')
+RESULTS_MAX_BYTES = 256 * 1024 * 1024
+
+
+def run_model(params=None, steps=100, seed=None, output=None, collect_policy=None, resume=None, checkpoint=None,
+              burn_in=0, late_params=None, cache=True):
+    # con burn_in > 0 i primi burn_in step (dei steps totali) vengono dalla
+    # cache di warmstart.py, poi si applicano late_params (laying_rate, num_resources);
+    # il censimento parte dallo step burn_in e collect_policy vale da lì.
+    # cache False rifà tutto, burn-in compreso
+    if burn_in and burn_in >= steps:
+        raise ValueError("burn_in (%d) deve essere minore di steps (%d)" % (burn_in, steps))
+    model_params = dict(default_params)
+    model_params.update(params or {})
+    run = (model_params, steps, seed, collect_policy, resume, checkpoint, burn_in, late_params, cache)
+
+    # senza seed la run non è riproducibile, con resume/checkpoint serve il modello vero
+    if not cache or seed is None or resume is not None or checkpoint is not None:
+        census = _simulate(*run)
+    else:
+        # con il burn-in il censimento dipende anche da warmstart.py e dai checkpoint
+        engine = source_hash(WARMSTART_SOURCES if burn_in else MODEL_SOURCES)
+        key = cache_key(kind='result', engine=engine, params=model_params, seed=seed, steps=steps,
+                        collect=collect_policy.describe() if collect_policy else None,
+                        burn_in=burn_in, late_params=late_params or {})
+        results = DiskCache(RESULTS_DIR, max_bytes=RESULTS_MAX_BYTES)
+        census = results.load(key, _load_census)
+        if census is None:
+            with results.lock(key):
+                census = results.load(key, _load_census)
+                if census is None:
+                    census = _simulate(*run)
+                    results.store(key, lambda path: _save_census(census, path))
+
+    if output is not None:
+        census.to_csv(output, index_label='step')
+    return census
+
+
+def _load_census(path):
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame(data['census'], index=pd.Index(data['steps'], name='step'),
+                            columns=list(CENSUS_COLUMNS))
+
+
+def _save_census(census, path):
+    np.savez_compressed(path, census=census.to_numpy(), steps=census.index.to_numpy())
+
+
+def _simulate(model_params, steps, seed, collect_policy, resume, checkpoint, burn_in, late_params, cache):
+    if resume is not None:
+        model = load_checkpoint(resume, collect_policy=collect_policy)
+    elif burn_in:
+        model = warm_start(model_params, seed, burn_in, collect_policy=collect_policy, cache=cache)
+        apply_params(model, late_params or {})
+        steps -= burn_in
+    else:
+        model = HiveModel(**model_params, planned_steps=steps, collect_policy=collect_policy, seed=seed)
+
+    for _ in range(steps):
+        model.step()
+
+    if checkpoint is not None:
+        save_checkpoint(model, checkpoint)
+
+    return model.datacollector.get_model_vars_dataframe()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulazione headless di HiveModel")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="census.csv")
+    parser.add_argument("--collect", default="every",
+                        help="every, every:K, final oppure events (soglia 0 sulle guardiane, estinzione, morte della regina)")
+    parser.add_argument("--checkpoint", default=None, help="salva lo stato finale in questo .npz")
+    parser.add_argument("--resume", default=None, help="riparte dallo stato salvato in questo .npz")
+    parser.add_argument("--no-cache", action="store_true", help="rifà la simulazione anche se è già in cache")
+    for name, value in default_params.items():
+        parser.add_argument("--" + name, type=type(value), default=value)
+    return parser.parse_args(argv)
+
+
+def parse_policy(collect, steps):
+    if collect == 'every':
+        return None
+    if collect.startswith('every:'):
+        return EveryKSteps(int(collect.split(':', 1)[1]))
+    if collect == 'final':
+        return FinalStep(steps)
+    if collect == 'events':
+        return OnEvents(thresholds={'Guard': 0})
+    raise ValueError("politica di raccolta sconosciuta: %s" % collect)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    params = {name: getattr(args, name) for name in default_params}
+    run_model(params, steps=args.steps, seed=args.seed, output=args.output,
+              collect_policy=parse_policy(args.collect, args.steps),
+              resume=args.resume, checkpoint=args.checkpoint, cache=not args.no_cache)
@@ -0,0 +1,118 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from run_headless import run_model, parse_policy
+from warmstart import LATE_PARAMS
+
+'''
+sweep di parametri su HiveModel: espande una griglia di valori (laying_rate,
+percentage_*, N, num_resources, ...) con più repliche per punto, lancia tutte
+le simulazioni su un pool di processi e mette i censimenti in un'unica tabella.
+
+senza argomenti rifà la matrice delle cartelle lay5/ e lay10/:
+
+    python sweep.py --steps 300 --replicates 10 --output sweep.csv
+
+con --burn-in K i punti che differiscono solo per laying_rate o num_resources
+condividono i primi K step (stesso seed per replica, colonia presa dalla
+cache di warmstart.py) e i valori dello sweep si applicano dopo il burn-in.
+I censimenti partono dallo step K e --collect vale per gli step successivi:
+
+    python sweep.py --steps 300 --burn-in 200 --replicates 10
+'''
+
+# composizioni iniziali delle cartelle lay5/ e lay10/
+COMPOSITIONS = {
+    'solonurse': {'percentage_foragers': 0.0, 'percentage_nurses': 1.0, 'percentage_guards': 0.0},
+    'sologuardiane': {'percentage_foragers': 0.0, 'percentage_nurses': 0.0, 'percentage_guards': 1.0},
+    'soloforaggere': {'percentage_foragers': 1.0, 'percentage_nurses': 0.0, 'percentage_guards': 0.0},
+    'nurseguardiane': {'percentage_foragers': 0.0, 'percentage_nurses': 0.5, 'percentage_guards': 0.5},
+    'nurseforaggere': {'percentage_foragers': 0.5, 'percentage_nurses': 0.5, 'percentage_guards': 0.0},
+}
+
+LAY_GRID = {
+    'laying_rate': [5, 10],
+    'composition': list(COMPOSITIONS),
+}
+
+
+def expand_grid(grid, replicates=1, seed=0, shared_seeds=False):
+    # ogni run è (etichette, parametri del modello, seed); 'composition' è un
+    # nome di COMPOSITIONS che imposta insieme le tre percentuali. Con
+    # shared_seeds il seed dipende solo dalla replica, non dal punto della griglia
+    names = list(grid)
+    runs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        labels = dict(zip(names, values))
+        params = {name: value for name, value in labels.items() if name != 'composition'}
+        if 'composition' in labels:
+            params.update(COMPOSITIONS[labels['composition']])
+        for replicate in range(replicates):
+            run_seed = seed + replicate if shared_seeds else seed + len(runs)
+            runs.append((dict(labels, replicate=replicate), params, run_seed))
+    return runs
+
+
+def _run_one(run, steps, collect, burn_in=0):
+    labels, params, seed = run
+    if burn_in:
+        late = {name: value for name, value in params.items() if name in LATE_PARAMS}
+        early = {name: value for name, value in params.items() if name not in LATE_PARAMS}
+        census = run_model(early, steps=steps, seed=seed, collect_policy=parse_policy(collect, steps - burn_in),
+                           burn_in=burn_in, late_params=late)
+    else:
+        census = run_model(params, steps=steps, seed=seed, collect_policy=parse_policy(collect, steps))
+    census = census.reset_index()
+    for name, value in labels.items():
+        census[name] = value
+    census['seed'] = seed
+    return census
+
+
+def run_sweep(grid, steps=100, replicates=1, seed=0, workers=None, collect='every', burn_in=0):
+    runs = expand_grid(grid, replicates, seed, shared_seeds=burn_in > 0)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_one, runs, itertools.repeat(steps), itertools.repeat(collect),
+                                itertools.repeat(burn_in), chunksize=max(1, len(runs) // (4 * workers))))
+    return pd.concat(results, ignore_index=True)
+
+
+def parse_grid(items):
+    # --grid laying_rate=5,10 --grid N=150,300
+    grid = {}
+    for item in items:
+        name, values = item.split('=', 1)
+        grid[name] = [_parse_value(v) for v in values.split(',')]
+    return grid
+
+
+def _parse_value(value):
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sweep di parametri su HiveModel")
+    parser.add_argument("--grid", action="append", default=[],
+                        help="nome=v1,v2,... (ripetibile), default: matrice lay5/lay10")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--replicates", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--collect", default="every", help="come in run_headless.py")
+    parser.add_argument("--burn-in", type=int, default=0,
+                        help="step iniziali in comune, laying_rate e num_resources si applicano dopo")
+    parser.add_argument("--output", default="sweep.csv")
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid) if args.grid else LAY_GRID
+    results = run_sweep(grid, steps=args.steps, replicates=args.replicates,
+                        seed=args.seed, workers=args.workers, collect=args.collect, burn_in=args.burn_in)
+    results.to_csv(args.output, index=False)
@@ -0,0 +1,67 @@
+import os
+import stat
+from cache import FILE_MODE, MODEL_SOURCES, WARMSTART_SOURCES, DiskCache, cache_key, source_hash
+
+
+def _write(size):
+    def saver(path):
+        with open(path, 'wb') as file:
+            file.write(b'x' * size)
+    return saver
+
+
+def _entries(cache):
+    return [name for name in os.listdir(cache.directory) if name.endswith(cache.suffix)]
+
+
+def test_store_and_load(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    key = cache_key(kind='test', n=1)
+    assert cache.load(key, os.path.getsize) is None
+    cache.store(key, _write(10))
+    assert cache.load(key, os.path.getsize) == 10
+
+
+def test_entries_get_the_umask_mode(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    key = cache_key(kind='test', n=1)
+    cache.store(key, _write(10))
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert FILE_MODE == 0o666 & ~umask
+    assert stat.S_IMODE(os.stat(cache.path(key)).st_mode) == FILE_MODE
+
+
+def test_source_hash_is_read_once_and_ignores_the_cli():
+    assert 'run_headless.py' not in MODEL_SOURCES and 'run_headless.py' not in WARMSTART_SOURCES
+    source_hash.cache_clear()
+    first = source_hash()
+    assert source_hash() == first
+    assert source_hash.cache_info().hits == 1
+
+
+def test_evict_keeps_lock_files_and_the_size_limit(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    keys = [cache_key(kind='test', n=n) for n in range(30)]
+    with cache.lock(keys[0]):
+        locks = os.listdir(tmp_path / 'locks')
+        for key in keys:
+            cache.store(key, _write(100))
+        assert os.listdir(tmp_path / 'locks') == locks
+
+    assert sum(os.path.getsize(os.path.join(cache.directory, name)) for name in _entries(cache)) <= 1000
+    # le più recenti restano
+    assert cache.load(keys[-1], os.path.getsize) == 100
+
+
+def test_evict_scans_only_past_the_limit(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_bytes=10000)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: scans.append(1) or evict())
+    for n in range(200):
+        cache.store(cache_key(kind='test', n=n), _write(100))
+    # la prima scrittura, poi una scansione ogni volta che si superano i
+    # 10000 byte (dopo la 101esima e poi ogni 11, tornando a 9000)
+    assert len(scans) == 1 + 1 + (200 - 101) // 11
+    assert cache.size == sum(os.path.getsize(os.path.join(cache.directory, name)) for name in _entries(cache))
@@ -0,0 +1,11 @@
+import pytest
+from census import EveryKSteps
+from run_headless import parse_policy
+
+
+@pytest.mark.parametrize('k', [0, -3])
+def test_every_k_steps_rejects_k_below_one(k):
+    with pytest.raises(ValueError):
+        EveryKSteps(k)
+    with pytest.raises(ValueError):
+        parse_policy('every:%d' % k, 100)
@@ -0,0 +1,61 @@
+import numpy as np
+from beehivemodel_modellofinale import HiveModel, default_params
+from census import EveryKSteps, FinalStep
+from checkpoint import load_checkpoint, save_checkpoint
+from run_headless import run_model
+
+PARAMS = dict(default_params, N=60, width=12, height=12, num_resources=200, laying_rate=5)
+
+
+def test_resume_writes_the_same_final_row(tmp_path):
+    ckpt = str(tmp_path / 'c30.npz')
+    straight = run_model(PARAMS, steps=50, seed=4, collect_policy=FinalStep(50), cache=False)
+    run_model(PARAMS, steps=30, seed=4, collect_policy=FinalStep(30), checkpoint=ckpt, cache=False)
+    resumed = run_model(steps=20, resume=ckpt, collect_policy=FinalStep(20), cache=False)
+
+    assert list(straight.index) == [0, 50]
+    assert list(resumed.index) == [0, 30, 50]
+    assert (resumed.loc[50] == straight.loc[50]).all()
+
+
+def test_every_k_keeps_its_phase_after_resume(tmp_path):
+    ckpt = str(tmp_path / 'c25.npz')
+    straight = run_model(PARAMS, steps=50, seed=4, collect_policy=EveryKSteps(10), cache=False)
+    run_model(PARAMS, steps=25, seed=4, collect_policy=EveryKSteps(10), checkpoint=ckpt, cache=False)
+    resumed = run_model(steps=25, resume=ckpt, collect_policy=EveryKSteps(10), cache=False)
+
+    assert list(resumed.index) == list(straight.index) == [0, 10, 20, 30, 40, 50]
+    assert (resumed.to_numpy() == straight.to_numpy()).all()
+
+
+def test_params_survive_save_load_save_load(tmp_path):
+    model = HiveModel(**PARAMS, seed=2)
+    for _ in range(5):
+        model.step()
+    for name in ('a.npz', 'b.npz'):
+        save_checkpoint(model, str(tmp_path / name))
+        model = load_checkpoint(str(tmp_path / name))
+
+    assert model.params == PARAMS
+    assert model.num_bees == PARAMS['N']
+
+    reference = HiveModel(**PARAMS, seed=2)
+    for _ in range(15):
+        reference.step()
+    for _ in range(10):
+        model.step()
+    assert np.array_equal(model.datacollector.get_array(), reference.datacollector.get_array())
+
+
+def test_any_seed_survives_a_reload(tmp_path):
+    for seed in ('alveare', [1, 2, 3], 2 ** 70, None):
+        model = HiveModel(**PARAMS, seed=seed)
+        for _ in range(5):
+            model.step()
+        save_checkpoint(model, str(tmp_path / 'seed.npz'))
+        loaded = load_checkpoint(str(tmp_path / 'seed.npz'))
+        assert loaded.entropy == model.entropy and loaded.key == model.key
+        for _ in range(5):
+            model.step()
+            loaded.step()
+        assert np.array_equal(loaded.datacollector.get_array(), model.datacollector.get_array())
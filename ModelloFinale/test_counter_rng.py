@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from beehive_vectorized import TASKS, VectorHiveModel
+from beehivemodel_modellofinale import Bee, HiveModel, default_params
+from counter_rng import STEP, model_uniforms, philox4x32, seed_key, uniforms
+
+# vettori di prova di Random123 (kat_vectors) per philox4x32-10
+KAT = [
+    ((0, 0, 0, 0), (0, 0), (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8)),
+    ((0xffffffff,) * 4, (0xffffffff,) * 2, (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd)),
+    ((0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344), (0xa4093822, 0x299f31d0),
+     (0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1)),
+]
+
+
+@pytest.mark.parametrize('counter, key, expected', KAT)
+def test_philox_known_answers(counter, key, expected):
+    assert tuple(int(word) for word in philox4x32(counter, key)) == expected
+
+
+def test_draws_are_pure_and_batched():
+    key = seed_key(9)
+    batch = uniforms(key, np.arange(1, 100), 7, STEP)
+    single = np.array([uniforms(key, uid, 7, STEP) for uid in range(1, 100)])
+    assert np.array_equal(batch, single)
+    assert not np.array_equal(batch, uniforms(key, np.arange(1, 100), 8, STEP))
+    assert np.array_equal(model_uniforms(key, 3, STEP, 6), uniforms(key, 0, 3, STEP, np.arange(2)).ravel()[:6])
+
+
+def test_both_engines_draw_the_same_values():
+    hive = HiveModel(**default_params, seed=11)
+    vector = VectorHiveModel(**default_params, seed=11)
+    bees = [agent for agent in hive.schedule.agents if isinstance(agent, Bee)]
+
+    assert hive.key == vector.key
+    assert [bee.unique_id for bee in bees] == vector.ids.tolist()
+    # stesse uniformi di nascita: stessa età e stesso JH per ogni id
+    assert [bee.task for bee in bees] == [TASKS[t] for t in vector.task]
+    assert [bee.age for bee in bees] == vector.age.tolist()
+    assert np.allclose([bee.JH_level for bee in bees], vector.JH_level)
+
+    hive.prepare_draws()
+    step_draws = uniforms(vector.key, vector.ids, vector.steps, STEP)
+    assert np.array_equal([hive.draws[bee.unique_id] for bee in bees], step_draws)
@@ -0,0 +1,30 @@
+from beehivemodel_modellofinale import Bee, HiveModel, default_params
+
+
+def _bees(model):
+    return [agent for agent in model.schedule.agents if isinstance(agent, Bee)]
+
+
+def test_due_bees_do_not_act_and_leave_at_the_end_of_the_step():
+    params = dict(default_params, N=20, percentage_foragers=1.0, percentage_nurses=0.0, percentage_guards=0.0)
+    model = HiveModel(**params, seed=1)
+    model.events = {}
+    for bee in _bees(model):
+        bee.age = Bee.max_age
+        model.post_event(1, 'retire', bee)
+    before = model.hive_resources
+
+    model.step()
+
+    # hanno mangiato (api e regina) ma nessuna forager ha portato cibo
+    assert model.hive_resources == before - 20 - 1
+    assert _bees(model) == []
+
+
+def test_no_live_bee_is_past_due_after_a_step():
+    for resources in (450, 40):
+        model = HiveModel(**dict(default_params, num_resources=resources), seed=3)
+        for _ in range(120):
+            model.step()
+            for bee in _bees(model):
+                assert bee.age <= bee.max_age and bee.lifecredit > 0
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from beehive_vectorized import BEE, LARVA, TASKS, VectorHiveModel
+from beehivemodel_modellofinale import Bee, HiveModel, Larvae, default_params
+
+# griglia piccola che si riempie, alveare normale e alveare che muore di fame
+CASES = [
+    dict(default_params, N=60, width=10, height=10, laying_rate=10),
+    dict(default_params),
+    dict(default_params, num_resources=40),
+]
+
+
+def _check_hive(model):
+    agents = list(model.schedule.agents)
+    assert not any(agent.dead for agent in agents)
+    assert not model.removed
+
+    # occupancy e celle libere contro il contenuto della griglia
+    occupancy = np.zeros_like(model.occupancy)
+    for contents, (x, y) in model.grid.coord_iter():
+        occupancy[x, y] = len(contents)
+    assert np.array_equal(model.occupancy, occupancy)
+    assert set(model.free_cells) == set(zip(*np.nonzero(occupancy == 0)))
+    assert len(model.free_cells) == len(model.free_index)
+    assert all(model.free_index[pos] == i for i, pos in enumerate(model.free_cells))
+
+    # totalbees e mappa delle larve contro lo scheduler
+    bees = [agent for agent in agents if isinstance(agent, Bee)]
+    larvae = [agent for agent in agents if isinstance(agent, Larvae)]
+    assert all(agent.pos is not None for agent in agents)
+    for task in TASKS:
+        assert model.totalbees[task] == sum(bee.task == task for bee in bees)
+    assert model.totalbees['Larvae'] == model.larvae_count == len(larvae)
+    assert set(zip(*np.nonzero(model.larvae_map))) == {larva.pos for larva in larvae}
+
+
+def _check_vector(model):
+    n = len(model.task)
+    assert all(len(column) == n for column in (model.ids, model.age, model.JH_level, model.lifecredit, model.x, model.y))
+    assert len(np.unique(model.ids)) == n
+    # ogni ape e ogni larva sta da sola nella sua cella
+    bees = np.zeros_like(model.cells, dtype=bool)
+    bees[model.x, model.y] = True
+    assert len(set(zip(model.x.tolist(), model.y.tolist()))) == n
+    assert np.array_equal(model.cells == BEE, bees)
+    larvae = np.zeros_like(bees)
+    larvae[model.larvae_x, model.larvae_y] = True
+    assert np.array_equal(model.cells == LARVA, larvae)
+    assert (model.lifecredit > 0).all() and (model.age <= 35).all()
+
+
+@pytest.mark.parametrize('batch_moves', [True, False])
+@pytest.mark.parametrize('params', CASES)
+def test_hive_bookkeeping_matches_a_scan(params, batch_moves):
+    model = HiveModel(**params, batch_moves=batch_moves, seed=8)
+    _check_hive(model)
+    for _ in range(60):
+        model.step()
+        _check_hive(model)
+
+
+@pytest.mark.parametrize('params', CASES)
+def test_vector_state_matches_the_grid(params):
+    model = VectorHiveModel(**params, seed=8)
+    _check_vector(model)
+    for _ in range(60):
+        model.step()
+        _check_vector(model)
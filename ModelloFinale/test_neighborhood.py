@@ -0,0 +1,19 @@
+from mesa.space import MultiGrid
+from neighborhood import NeighborhoodTable
+
+
+def test_same_cells_as_mesa_on_the_torus():
+    grid = MultiGrid(7, 9, True)
+    table = NeighborhoodTable(7, 9, radii=(1, 2))
+    for radius in (1, 2, 3):
+        for pos in [(0, 0), (6, 8), (3, 4), (0, 8)]:
+            expected = grid.get_neighborhood(pos, moore=True, include_center=False, radius=radius)
+            assert sorted(table.neighborhood(pos, radius)) == sorted(expected)
+
+
+def test_no_per_cell_cache():
+    table = NeighborhoodTable(50, 50)
+    for x in range(50):
+        for y in range(50):
+            table.neighborhood((x, y))
+    assert set(vars(table)) == {'width', 'height', 'x', 'y'}
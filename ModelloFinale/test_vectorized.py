@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from beehive_vectorized import VectorHiveModel
+from beehivemodel_modellofinale import HiveModel, default_params
+from counter_rng import STEP, uniforms
+
+COLUMNS = ['Nurse', 'Guard', 'Forager', 'Larvae', 'Resource']
+
+
+def _census(model):
+    if isinstance(model, HiveModel):
+        return model.datacollector.get_model_vars_dataframe()[COLUMNS].to_numpy()
+    return model.get_model_vars_dataframe()[COLUMNS].to_numpy()
+
+
+@pytest.mark.parametrize('resources', [450, 100, 40])
+def test_first_step_matches_hive_model(resources):
+    params = dict(default_params, num_resources=resources)
+    for seed in range(5):
+        hive = HiveModel(**params, seed=seed)
+        vector = VectorHiveModel(**params, seed=seed)
+        hive.step()
+        vector.step()
+        assert np.array_equal(_census(hive), _census(vector))
+
+
+def test_all_fed_shortcut_matches_the_bee_by_bee_order():
+    model = VectorHiveModel(**default_params, seed=6)
+    checked = 0
+    for _ in range(40):
+        draws = uniforms(model.key, model.ids, model.steps, STEP)
+        doomed = (model.totalbees['Guard'] == 0) & (draws[:, 0] < 0.1)
+        target = model.lookaround()
+        loads = 1 + (draws[:, 2] * 8).astype(np.int64)
+        r0 = model.hive_resources
+        if r0 - len(target) - 3 * int((target >= 0).sum()) > 2:
+            shortcut = model._advance_all_fed(r0, loads, draws, doomed, target)
+            in_order = model._advance_in_order(r0, loads, draws, doomed, target)
+            for a, b in zip(shortcut, in_order):
+                assert np.array_equal(a, b)
+            checked += 1
+        model.step()
+    assert checked > 20
+
+
+@pytest.mark.parametrize('resources', [450, 100])
+def test_mean_census_matches_hive_model(resources):
+    # media per seed degli step 5-20, poi confronto delle medie sui seed
+    params = dict(default_params, num_resources=resources)
+    hive, vector = [], []
+    for seed in range(100, 116):
+        models = HiveModel(**params, seed=seed), VectorHiveModel(**params, seed=seed)
+        for _ in range(20):
+            for model in models:
+                model.step()
+        hive.append(_census(models[0])[5:].mean(axis=0))
+        vector.append(_census(models[1])[5:].mean(axis=0))
+
+    hive, vector = np.array(hive), np.array(vector)
+    se = np.sqrt((hive.var(axis=0, ddof=1) + vector.var(axis=0, ddof=1)) / len(hive))
+    assert (np.abs(hive.mean(axis=0) - vector.mean(axis=0)) < 3 * se).all()
@@ -0,0 +1,46 @@
+import os
+import pytest
+import run_headless
+import warmstart
+from census import FinalStep
+from run_headless import run_model
+from sweep import _run_one
+
+PARAMS = dict(N=60, width=12, height=12, num_resources=200, laying_rate=5)
+
+
+@pytest.fixture(autouse=True)
+def cache_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(warmstart, 'WARMSTART_DIR', str(tmp_path / 'warmstart'))
+    monkeypatch.setattr(run_headless, 'RESULTS_DIR', str(tmp_path / 'results'))
+    return tmp_path
+
+
+def test_burn_in_matches_straight_run_on_miss_and_hit():
+    straight = run_model(PARAMS, steps=40, seed=5, cache=False)
+    miss = run_model(PARAMS, steps=40, seed=5, burn_in=15, cache=False)
+    run_model(PARAMS, steps=30, seed=5, burn_in=15)
+    hit = run_model(PARAMS, steps=40, seed=5, burn_in=15)
+
+    for census in (miss, hit):
+        assert list(census.index) == list(range(15, 41))
+        assert (census.to_numpy() == straight.loc[15:].to_numpy()).all()
+
+
+@pytest.mark.parametrize('seed', [None, 5])
+def test_burn_in_with_collect_final(seed):
+    # come sweep.py --burn-in 15 --collect final, con e senza la cache di warm start
+    for _ in range(2):
+        census = _run_one(({'laying_rate': 5}, PARAMS, seed), steps=40, collect='final', burn_in=15)
+        assert list(census['step']) == [15, 40]
+
+
+def test_no_cache_skips_the_warm_start_cache(cache_dirs):
+    run_model(PARAMS, steps=30, seed=5, burn_in=10, collect_policy=FinalStep(20), cache=False)
+    assert not os.path.exists(cache_dirs / 'warmstart')
+    assert not os.path.exists(cache_dirs / 'results')
+
+
+def test_burn_in_must_be_shorter_than_the_run():
+    with pytest.raises(ValueError):
+        run_model(PARAMS, steps=20, seed=5, burn_in=20)
@@ -0,0 +1,68 @@
+import os
+from beehivemodel_modellofinale import HiveModel
+from cache import CACHE_DIR, WARMSTART_SOURCES, DiskCache, cache_key, source_hash
+from census import CollectionPolicy
+from checkpoint import load_checkpoint, save_checkpoint
+
+'''
+colonie già "scaldate": lo stato di HiveModel dopo burn_in step, salvato come
+checkpoint in una cache su disco con chiave (parametri, seed, burn_in, sorgenti
+del modello). Tanti punti di uno sweep hanno lo stesso transitorio iniziale e
+cambiano solo laying_rate o le risorse: il transitorio si calcola una volta e
+gli altri ripartono dal checkpoint, poi apply_params cambia quello che serve.
+'''
+
+# parametri che si possono cambiare a run avviata
+LATE_PARAMS = ('laying_rate', 'num_resources')
+
+WARMSTART_DIR = os.path.join(CACHE_DIR, 'warmstart')
+
+
+def apply_params(model, changes):
+    for name, value in changes.items():
+        if name == 'laying_rate':
+            model.queen.laying_rate = value
+        elif name == 'num_resources':
+            # dopo il burn-in cambia solo il tetto, non le risorse già nell'alveare
+            model.maxresource = value
+        else:
+            raise ValueError("%s non si può cambiare a run avviata" % name)
+        model.params[name] = value
+
+
+def warm_start(params, seed, burn_in, collect_policy=None, cache=True):
+    '''
+    HiveModel con i parametri params dopo burn_in step, dalla cache se c'è.
+    Il transitorio non entra nel censimento: il modello restituito ha una
+    sola riga, lo stato allo step burn_in, e collect_policy parte da lì.
+    Con seed None (run non riproducibile) o cache False la cache non si usa.
+    '''
+    if seed is None or not cache:
+        model = _burn_in(params, seed, burn_in)
+    else:
+        store = DiskCache(WARMSTART_DIR)
+        key = cache_key(kind='warmstart', params=params, seed=seed, burn_in=burn_in,
+                        engine=source_hash(WARMSTART_SOURCES))
+        model = store.load(key, load_checkpoint)
+        if model is None:
+            with store.lock(key):
+                # un altro worker potrebbe averlo calcolato mentre aspettavamo
+                model = store.load(key, load_checkpoint)
+                if model is None:
+                    model = _burn_in(params, seed, burn_in)
+                    store.store(key, lambda path: save_checkpoint(model, path))
+
+    # stessa partenza con e senza cache: solo lo stato attuale nel censimento
+    collector = model.datacollector
+    collector.length = 0
+    collector.collect(model)
+    model.collect_policy = collect_policy or CollectionPolicy()
+    model.collect_policy.start(model)
+    return model
+
+
+def _burn_in(params, seed, burn_in):
+    model = HiveModel(**params, planned_steps=burn_in, seed=seed)
+    for _ in range(burn_in):
+        model.step()
+    return model
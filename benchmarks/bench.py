@@ -0,0 +1,223 @@
+import argparse
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+'''
+benchmark dei modelli senza visualizzazione: per ogni combinazione di motore,
+numero di api N, dimensione della griglia e laying_rate misura step al secondo,
+memoria di picco e percentili della latenza per step, e salva tutto in json
+così che i risultati si possano confrontare tra una modifica e l'altra.
+
+motori:
+- modellofinale: HiveModel di ModelloFinale/beehivemodel_modellofinale.py
+- vector: VectorHiveModel di ModelloFinale/beehive_vectorized.py
+- hive: HiveModel del package hive/ (parametri di hive/setup.yaml)
+
+    python benchmarks/bench.py --quick
+    python benchmarks/bench.py --steps 50 --output benchmarks/baseline.json
+    python benchmarks/bench.py --steps 50 --output new.json --compare benchmarks/baseline.json
+
+ogni caso gira in un processo nuovo, così la memoria di picco non si somma
+tra un caso e l'altro e i moduli dei due package (bee, hive, resource, ...)
+non si pestano i piedi.
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINES = ('modellofinale', 'vector', 'hive')
+SIZES = (150, 1000, 10000, 100000)
+GRIDS = ((17, 17), (100, 100), (1000, 1000))
+LAYING_RATES = (1, 10, 50)
+
+QUICK = {
+    'engines': ENGINES,
+    'sizes': (150, 1000),
+    'grids': ((17, 17), (100, 100)),
+    'laying_rates': (10,),
+}
+
+
+def _load_rusage():
+    # hive/resource.py ha lo stesso nome del modulo resource della libreria
+    # standard: ci teniamo quello vero e lo togliamo da sys.modules prima di
+    # importare il package hive
+    try:
+        rusage = importlib.import_module('resource')
+    except ImportError:
+        return None
+    sys.modules.pop('resource', None)
+    return rusage
+
+
+def _peak_rss_mb(rusage):
+    if rusage is None:
+        return None
+    peak = rusage.getrusage(rusage.RUSAGE_SELF).ru_maxrss
+    # kB su linux, byte su macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _build_model(engine, N, width, height, laying_rate, seed):
+    if engine == 'modellofinale':
+        sys.path.insert(0, os.path.join(ROOT, 'ModelloFinale'))
+        from beehivemodel_modellofinale import HiveModel, default_params
+        params = dict(default_params, N=N, width=width, height=height, laying_rate=laying_rate)
+        return HiveModel(**params, seed=seed)
+
+    if engine == 'vector':
+        sys.path.insert(0, os.path.join(ROOT, 'ModelloFinale'))
+        from beehive_vectorized import VectorHiveModel
+        from beehivemodel_modellofinale import default_params
+        params = dict(default_params, N=N, width=width, height=height, laying_rate=laying_rate)
+        return VectorHiveModel(**params, seed=seed)
+
+    if engine == 'hive':
+        sys.path.insert(0, os.path.join(ROOT, 'hive'))
+        import yaml
+        from hive import HiveModel
+        with open(os.path.join(ROOT, 'hive', 'setup.yaml')) as file:
+            params = yaml.safe_load(file)['initmodel']
+        params.update(numbee=N, width=width, height=height)
+        model = HiveModel(**params)
+        model.reset_randomizer(seed)
+        model.queen.laying_rate = laying_rate
+        return model
+
+    raise ValueError("motore sconosciuto: %s" % engine)
+
+
+def run_case(case):
+    rusage = _load_rusage()
+    import_rss = _peak_rss_mb(rusage)
+
+    start = time.perf_counter()
+    model = _build_model(case['engine'], case['N'], case['width'], case['height'],
+                         case['laying_rate'], case['seed'])
+    setup_time = time.perf_counter() - start
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(case['steps']):
+        t = time.perf_counter()
+        model.step()
+        latencies.append(time.perf_counter() - t)
+        if time.perf_counter() - start > case['max_seconds']:
+            break
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    percentile = lambda q: float(np.percentile(latencies, q)) if len(latencies) else None
+    return dict(
+        case,
+        steps_done=len(latencies),
+        setup_s=setup_time,
+        steps_per_s=len(latencies) / elapsed if elapsed > 0 else None,
+        latency_ms_p50=percentile(50),
+        latency_ms_p90=percentile(90),
+        latency_ms_p99=percentile(99),
+        latency_ms_max=float(latencies.max()) if len(latencies) else None,
+        import_rss_mb=import_rss,
+        peak_rss_mb=_peak_rss_mb(rusage),
+    )
+
+
+def make_cases(engines, sizes, grids, laying_rates, steps, seed, max_seconds):
+    cases = []
+    for engine, N, (width, height), laying_rate in itertools.product(engines, sizes, grids, laying_rates):
+        # in ModelloFinale c'è al massimo un'ape per cella (più la regina)
+        if engine != 'hive' and N >= width * height:
+            continue
+        cases.append(dict(engine=engine, N=N, width=width, height=height, laying_rate=laying_rate,
+                          steps=steps, seed=seed, max_seconds=max_seconds))
+    return cases
+
+
+def _fmt(value, spec):
+    # i casi falliti o senza misura hanno None
+    return 'n/a'.rjust(len(format(0.0, spec))) if value is None else format(value, spec)
+
+
+def run_cases(cases):
+    # un processo nuovo per ogni caso (spawn, non fork)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for case in cases:
+        try:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_case, (case,))
+        except Exception as error:
+            # un caso che fallisce non ferma il resto della matrice
+            result = dict(case, error=repr(error), steps_done=0, setup_s=None, steps_per_s=None,
+                          latency_ms_p50=None, latency_ms_p90=None, latency_ms_p99=None,
+                          latency_ms_max=None, import_rss_mb=None, peak_rss_mb=None)
+        results.append(result)
+        print("{:>13} N={:<6} grid={}x{:<5} lay={:<3} {} step/s  p50={}ms  p99={}ms  peak={}MB{}".format(
+            result['engine'], result['N'], result['width'], result['height'], result['laying_rate'],
+            _fmt(result['steps_per_s'], '9.2f'), _fmt(result['latency_ms_p50'], '8.2f'),
+            _fmt(result['latency_ms_p99'], '8.2f'), _fmt(result['peak_rss_mb'], '.1f'),
+            '  errore: ' + result['error'] if 'error' in result else ''), flush=True)
+    return results
+
+
+def compare(results, baseline_path):
+    # rapporto step/s rispetto a una baseline salvata, per gli stessi casi
+    with open(baseline_path) as file:
+        baseline = json.load(file)['results']
+    key = lambda r: (r['engine'], r['N'], r['width'], r['height'], r['laying_rate'])
+    old = {key(r): r for r in baseline}
+    for result in results:
+        before = old.get(key(result))
+        if before is None or not before['steps_per_s'] or not result['steps_per_s']:
+            continue
+        print("{:>13} N={:<6} grid={}x{:<5} lay={:<3} x{:.2f} step/s rispetto alla baseline".format(
+            *key(result), result['steps_per_s'] / before['steps_per_s']))
+
+
+def _parse_list(value, cast=int):
+    return tuple(cast(v) for v in value.split(','))
+
+
+def _parse_grid(value):
+    return tuple(tuple(int(x) for x in g.split('x')) for g in value.split(','))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark dei modelli HiveModel")
+    parser.add_argument("--engines", type=lambda v: _parse_list(v, str), default=ENGINES)
+    parser.add_argument("--sizes", type=_parse_list, default=SIZES, help="es. 150,1000,100000")
+    parser.add_argument("--grids", type=_parse_grid, default=GRIDS, help="es. 17x17,1000x1000")
+    parser.add_argument("--laying-rates", type=_parse_list, default=LAYING_RATES)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-seconds", type=float, default=60.0,
+                        help="tempo massimo per caso, poi si ferma e riporta gli step fatti")
+    parser.add_argument("--quick", action="store_true", help="matrice ridotta per una prova veloce")
+    parser.add_argument("--output", default=os.path.join(ROOT, 'benchmarks', 'baseline.json'))
+    parser.add_argument("--compare", default=None, help="json di una run precedente da usare come riferimento")
+    args = parser.parse_args()
+
+    if args.quick:
+        matrix = QUICK
+    else:
+        matrix = dict(engines=args.engines, sizes=args.sizes, grids=args.grids, laying_rates=args.laying_rates)
+    cases = make_cases(steps=args.steps, seed=args.seed, max_seconds=args.max_seconds, **matrix)
+    results = run_cases(cases)
+    if args.compare:
+        compare(results, args.compare)
+
+    with open(args.output, 'w') as file:
+        json.dump({
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'mesa': importlib.import_module('mesa').__version__,
+            'results': results,
+        }, file, indent=2)
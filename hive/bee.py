@@ -2,9 +2,6 @@ from mesa import Agent, Model
 from mesa.time import RandomActivation
 from mesa.space import MultiGrid
 from mesa.datacollection import DataCollector
-from mesa.visualization.modules import CanvasGrid, ChartModule
-from mesa.visualization.ModularVisualization import ModularServer
-from resource import ResourcePatch
 
 class Bee(Agent):
     def __init__(self, unique_id, model, task):
@@ -26,15 +23,22 @@ class Bee(Agent):
             return 'Forager'
 
     def step(self):
+        # guard_hive toglie l'ape solo dalla griglia: da morta non fa più niente
+        if self.pos is None:
+            return
+
         # simulating bee feeding. If no resource, the bee looses a lifecredit
         self.JH_level = min(1.0, max(0.0, self.JH_level + 0.01 * self.age))
         self.task = self.assign_task()
         self.feed()
+        if self.pos is None:
+            return
 
         if self.age >= 35:
             self.model.totalbees[self.task] -= 1
             self.model.grid.remove_agent(self)
             self.model.schedule.remove(self)
+            return
         
         if self.task == 'Forager':
             self.forage()
@@ -70,15 +74,14 @@ class Bee(Agent):
             return
 
         # Find the nearest resource patch with available resources
-        nearby_resources = self.model.grid.get_neighbors(self.pos, moore=True, radius=2, include_center=False)
-        resource_patches = [agent for agent in nearby_resources if isinstance(agent, ResourcePatch)]
+        resource_patches = self.model.resources.near(self.pos, radius=2)
 
         if resource_patches:
             chosen_patch = self.random.choice(resource_patches)
 
             # Increase the closest resource patch's resources based on a random amount
             resource_increase = self.random.randint(1, 50)
-            chosen_patch.resource_amount += resource_increase
+            self.model.resources.amount[chosen_patch] += resource_increase
 
             # Simulate foraging from the resource patch
             collected_amount = min(self.model.hive_resources, resource_increase)
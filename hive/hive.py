@@ -2,21 +2,24 @@ from mesa import Model
 from mesa.time import RandomActivation
 from mesa.space import MultiGrid
 from mesa.datacollection import DataCollector
-from mesa.visualization.modules import CanvasGrid, ChartModule
-from mesa.visualization.ModularVisualization import ModularServer
 from bee import Bee
-from resource import ResourcePatch
+from resource import ResourceField
+from neighborhood import NeighborhoodTable
 
 class HiveModel(Model):
     def __init__(self, numbee, width, height, num_resources, max_resource_amount, regeneration_rate, percentage_foragers, percentage_nurses, percentage_guards):
         self.num_bee = numbee
         self.grid = MultiGrid(width, height, torus=True)
+        # le forager cercano le risorse nel raggio 2, vicini precalcolati
+        self.neighbors = NeighborhoodTable(width, height, radii=(2,))
         self.schedule = RandomActivation(self)
         self.current_id = 0
         self.hive_resources = 10 
         self.larvae = []
         self.max_resource_amount = max_resource_amount
         self.regeneration_rate = regeneration_rate
+        # le risorse non sono agenti: un campo sulla griglia, fuori dallo scheduler
+        self.resources = ResourceField(self.neighbors, max_resource_amount, regeneration_rate)
 
         num_of_foragers = int(self.num_bee*percentage_foragers)
         num_of_nurses = int(self.num_bee*percentage_nurses)
@@ -25,9 +28,9 @@ class HiveModel(Model):
 
         # Create queen bee
         from queenbee import QueenBee
-        queen = QueenBee(self.next_id(), self)
-        self.schedule.add(queen)
-        self.grid.place_agent(queen, (self.grid.width // 2, self.grid.height // 2))
+        self.queen = QueenBee(self.next_id(), self)
+        self.schedule.add(self.queen)
+        self.grid.place_agent(self.queen, (self.grid.width // 2, self.grid.height // 2))
 
             
         # tre for loop per ogni task dell'ape. un po' brutto ma funziona
@@ -54,11 +57,10 @@ class HiveModel(Model):
 
 
         for _ in range(num_resources):
-            resource = ResourcePatch(self.next_id(), self, self.random.randint(1, max_resource_amount))
-            self.schedule.add(resource)
+            resource_amount = self.random.randint(1, max_resource_amount)
             x = self.random.randrange(self.grid.width)
             y = self.random.randrange(self.grid.height)
-            self.grid.place_agent(resource, (x, y))
+            self.resources.add_patch((x, y), resource_amount)
 
 
         self.totalbees = {
@@ -83,5 +85,6 @@ class HiveModel(Model):
         return self.current_id
 
     def step(self):
+        self.resources.step()
         self.schedule.step()
         self.datacollector.collect(self)
\ No newline at end of file
@@ -0,0 +1,13 @@
+import importlib.util
+import os
+
+# la tabella dei vicini è una sola, in ModelloFinale/neighborhood.py. hive/ e
+# ModelloFinale/ sono cartelle di script con import tra file vicini, quindi la
+# carichiamo per percorso: "import neighborhood" qui troverebbe questo file
+_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ModelloFinale', 'neighborhood.py')
+_spec = importlib.util.spec_from_file_location('modellofinale_neighborhood', _path)
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+
+moore_offsets = _module.moore_offsets
+NeighborhoodTable = _module.NeighborhoodTable
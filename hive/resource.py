@@ -1,15 +1,87 @@
-from mesa import Agent
+import numpy as np
 
-class ResourcePatch(Agent):
+class PatchIndex:
     '''
-    questo resource patch sono le risorse
+    dove sono i patch di risorse sulla griglia: count[x, y] dice quanti patch
+    ci sono nella cella. near() risponde "patch entro il raggio r da pos"
+    guardando solo la mappa, senza passare dalle api vicine.
     '''
 
-    def __init__(self, unique_id, model, resource_amount):
-        super().__init__(unique_id, model)
-        self.resource_amount = resource_amount  # The amount of nectar/pollen available
+    def __init__(self, neighbors):
+        self.neighbors = neighbors
+        self.count = np.zeros((neighbors.width, neighbors.height), dtype=np.int32)
+
+    def add(self, pos):
+        self.count[pos] += 1
+
+    def remove(self, pos):
+        if self.count[pos] == 0:
+            raise ValueError("nessun patch nella cella %s" % (pos,))
+        self.count[pos] -= 1
+
+    def near(self, pos, radius=2):
+        # celle con patch entro il raggio r da pos, ripetute una volta per
+        # patch e nello stesso ordine di grid.get_neighbors
+        x, y = self.neighbors.cells(pos, radius)
+        found = []
+        for i in np.flatnonzero(self.count[x, y]):
+            cell = (int(x[i]), int(y[i]))
+            found.extend([cell] * int(self.count[cell]))
+        return found
+
+
+class ResourceField:
+    '''
+    le risorse come campo numpy sulla griglia invece che come agenti:
+    amount[x, y] è la quantità di nettare/polline nella cella e index (un
+    PatchIndex) dice quanti patch ci sono stati messi (due patch nella stessa
+    cella diventano uno solo con il doppio della capacità).
+
+    step() rigenera tutti i patch con un solo aggiornamento vettoriale, le
+    forager leggono e scrivono direttamente amount[cella]. remove_patch()
+    toglie un patch (la cella resta con quello che sta nella capacità dei
+    patch rimasti) e set_amount() cambia la quantità di una cella.
+    '''
+
+    def __init__(self, neighbors, max_resource_amount, regeneration_rate):
+        self.neighbors = neighbors
+        self.max_resource_amount = max_resource_amount
+        self.regeneration_rate = regeneration_rate
+        self.amount = np.zeros((neighbors.width, neighbors.height), dtype=np.int64)
+        self.index = PatchIndex(neighbors)
+        self.count = self.index.count
+        # indici (appiattiti) delle celle con almeno un patch
+        self.patch_cells = np.zeros(0, dtype=np.intp)
+
+    def add_patch(self, pos, resource_amount):
+        if self.count[pos] == 0:
+            flat = np.ravel_multi_index(pos, self.count.shape)
+            self.patch_cells = np.append(self.patch_cells, flat)
+        self.index.add(pos)
+        self.amount[pos] += resource_amount
+
+    def remove_patch(self, pos):
+        self.index.remove(pos)
+        if self.count[pos] == 0:
+            flat = np.ravel_multi_index(pos, self.count.shape)
+            self.patch_cells = self.patch_cells[self.patch_cells != flat]
+            self.amount[pos] = 0
+        else:
+            self.amount[pos] = min(self.amount[pos], self.count[pos] * self.max_resource_amount)
+
+    def set_amount(self, pos, resource_amount):
+        if self.count[pos] == 0:
+            raise ValueError("nessun patch nella cella %s" % (pos,))
+        self.amount[pos] = resource_amount
 
     def step(self):
-        # Potentially regenerate resources over time
-        self.resource_amount += self.model.regeneration_rate
-        self.resource_amount = min(self.resource_amount, self.model.max_resource_amount)
\ No newline at end of file
+        # per ogni patch resource_amount += regeneration_rate, poi min con il
+        # massimo: una cella con count patch rigenera e contiene count volte tanto
+        amount = self.amount.reshape(-1)
+        cells = self.patch_cells
+        count = self.count.reshape(-1)[cells]
+        amount[cells] = np.minimum(amount[cells] + count * self.regeneration_rate,
+                                   count * self.max_resource_amount)
+
+    def near(self, pos, radius=2):
+        return self.index.near(pos, radius)
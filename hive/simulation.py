@@ -6,20 +6,17 @@ from mesa.visualization.modules import CanvasGrid, ChartModule
 from mesa.visualization.ModularVisualization import ModularServer
 from queenbee import QueenBee
 from bee import Bee
-from resource import ResourcePatch
 from hive import HiveModel
 import yaml
+import os
 
-with open('/Users/giovanna/Desktop/Magistrale/SecondoAnno/DAI/beehive/hive/setup.yaml', 'r') as file:
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'setup.yaml'), 'r') as file:
     config = yaml.safe_load(file)
 
 def bee_portrayal(agent):
     if agent is None:
         return
     
-    if isinstance(agent, ResourcePatch):
-        return {"Shape": "rect", "Color": "brown", "Filled": "true", "Layer": 0, "w": 1, "h": 1}
-    
     portrayal = {"Shape": "circle", "Filled": "true", "r": 0.5}
     
     if isinstance(agent, QueenBee):
@@ -17,15 +17,16 @@ class Egg(Agent):
 
         # Hatch the egg if the time is up
         if self.hatch_time <= 0:
+            # Remove the egg from the simulation (the bee keeps its unique_id)
+            pos = self.pos
+            self.model.grid.remove_agent(self)
+            self.model.schedule.remove(self)
+
             # Replace egg with a new bee
             new_bee = Bee(self.unique_id, self.model)
-            self.model.grid.place_agent(new_bee, self.pos)
+            self.model.grid.place_agent(new_bee, pos)
             self.model.schedule.add(new_bee)
 
-            # Remove the egg from the simulation
-            self.model.grid.remove_agent(self)
-            self.model.schedule.remove(self)
-
 class QueenBee(Agent):
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
@@ -54,31 +55,33 @@ class QueenBee(Agent):
             self.model.grid.place_agent(egg, (x, y))
             self.model.schedule.add(egg)
 
+def choose_task(pheromones):
+    if pheromones['queen'] < 0.2:
+        # Low queen pheromone increases the likelihood of becoming a nurse
+        if pheromones['nurse'] < 0.3:
+            return 'nurse'
+        return 'cleaner'
+    # Normal task differentiation
+    if pheromones['forager'] < 0.3:
+        return 'forager'
+    elif pheromones['nurse'] < 0.3:
+        return 'nurse'
+    elif pheromones['guard'] < 0.2:
+        return 'guard'
+    return 'cleaner'
+
 class Bee(Agent):
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
         self.task = "idle"  # Default task is idle
 
     def step(self):
+        # in modalità batched il task lo sceglie il modello per tutte le api
+        if self.model.batched:
+            return
+
         # The bee chooses its task based on the pheromone levels
-        pheromones = self.model.get_pheromone_levels()
-        
-        if pheromones['queen'] < 0.2:
-            # Low queen pheromone increases the likelihood of becoming a nurse
-            if pheromones['nurse'] < 0.3:
-                self.task = 'nurse'
-            else:
-                self.task = 'cleaner'
-        else:
-            # Normal task differentiation
-            if pheromones['forager'] < 0.3:
-                self.task = 'forager'
-            elif pheromones['nurse'] < 0.3:
-                self.task = 'nurse'
-            elif pheromones['guard'] < 0.2:
-                self.task = 'guard'
-            else:
-                self.task = 'cleaner'
+        self.task = choose_task(self.model.get_pheromone_levels())
         
         # Execute task logic
         self.perform_task()
@@ -94,8 +97,12 @@ class Bee(Agent):
             self.model.increase_pheromone('cleaner', 0.01)
 
 class HiveModel(Model):
-    def __init__(self, N, width=10, height=10):
+    def __init__(self, N, width=10, height=10, batched=False):
         self.num_bees = N
+        # batched: le api scelgono il task dai livelli di inizio step e i
+        # depositi si sommano e si applicano una volta sola, a fine step
+        self.batched = batched
+        self.deposits = {}
         self.grid = MultiGrid(width, height, True)
         self.schedule = RandomActivation(self)
         self.next_id_val = 0
@@ -125,7 +132,7 @@ class HiveModel(Model):
 
         # Create bees and place them in the model
         for i in range(self.num_bees):
-            bee = Bee(i, self)
+            bee = Bee(self.next_id(), self)
             self.schedule.add(bee)
             x = self.random.randrange(self.grid.width)
             y = self.random.randrange(self.grid.height)
@@ -138,6 +145,10 @@ class HiveModel(Model):
         return self.next_id_val
 
     def step(self):
+        if self.batched:
+            self.batched_step()
+            return
+
         # Update the model by one step
         self.schedule.step()
         # Pheromone decay (optional)
@@ -147,7 +158,36 @@ class HiveModel(Model):
     def get_pheromone_levels(self):
         return self.pheromone_levels
 
+    def batched_step(self):
+        # stessa scelta per tutte le api: dipende solo dai livelli di inizio
+        # step, non dall'ordine in cui lo scheduler le attiva
+        snapshot = dict(self.pheromone_levels)
+        task = choose_task(snapshot)
+        agents = self.schedule.agents
+        bees = [agent for agent in agents if type(agent) is Bee]
+        for bee in bees:
+            bee.task = task
+        self.deposits[task] = self.deposits.get(task, 0.0) + 0.01 * len(bees)
+
+        # solo regina e uova passano dallo scheduler (i loro depositi
+        # finiscono anche loro in self.deposits); le api hanno già fatto
+        others = [agent for agent in agents if type(agent) is not Bee]
+        self.random.shuffle(others)
+        for agent in others:
+            agent.step()
+        self.schedule.steps += 1
+        self.schedule.time += 1
+
+        for pheromone, amount in self.deposits.items():
+            self.pheromone_levels[pheromone] = min(1.0, self.pheromone_levels[pheromone] + amount)
+        self.deposits = {}
+        self.decay_pheromones()
+        self.datacollector.collect(self)
+
     def increase_pheromone(self, task, amount):
+        if self.batched:
+            self.deposits[task] = self.deposits.get(task, 0.0) + amount
+            return
         self.pheromone_levels[task] = min(1.0, self.pheromone_levels[task] + amount)
 
     def decay_pheromones(self):
@@ -179,27 +219,28 @@ def bee_portrayal(agent):
     portrayal["Layer"] = 0
     return portrayal
 
-# Set up the CanvasGrid for visualizing the agents on a grid
-grid_width = 10
-grid_height = 10
-grid = CanvasGrid(bee_portrayal, grid_width, grid_height, 500, 500)
-
-
-task_chart = ChartModule([
-    {"Label": "Forager Pheromone", "Color": "green"},
-    {"Label": "Nurse Pheromone", "Color": "blue"},
-    {"Label": "Guard Pheromone", "Color": "red"},
-    {"Label": "Cleaner Pheromone", "Color": "yellow"},
-    {"Label": "Queen Pheromone", "Color": "purple"},
-], data_collector_name='datacollector')
-
-# Set up the server to run the simulation with the grid visualization
-server = ModularServer(
-    HiveModel,
-    [grid, task_chart],
-    "Bee Hive Model",
-    {"N": 10, "width": grid_width, "height": grid_height}
-)
-
-server.port = 8521  # Set the port
-server.launch()     # Start the server
+if __name__ == '__main__':
+    # Set up the CanvasGrid for visualizing the agents on a grid
+    grid_width = 10
+    grid_height = 10
+    grid = CanvasGrid(bee_portrayal, grid_width, grid_height, 500, 500)
+
+
+    task_chart = ChartModule([
+        {"Label": "Forager Pheromone", "Color": "green"},
+        {"Label": "Nurse Pheromone", "Color": "blue"},
+        {"Label": "Guard Pheromone", "Color": "red"},
+        {"Label": "Cleaner Pheromone", "Color": "yellow"},
+        {"Label": "Queen Pheromone", "Color": "purple"},
+    ], data_collector_name='datacollector')
+
+    # Set up the server to run the simulation with the grid visualization
+    server = ModularServer(
+        HiveModel,
+        [grid, task_chart],
+        "Bee Hive Model",
+        {"N": 10, "width": grid_width, "height": grid_height}
+    )
+
+    server.port = 8521  # Set the port
+    server.launch()     # Start the server
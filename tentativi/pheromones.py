@@ -0,0 +1,107 @@
+import numpy as np
+
+PHEROMONES = ('queen', 'brood', 'forager', 'nurse', 'guard', 'cleaner', 'footprint', 'queen_footprint')
+
+
+class PheromoneField:
+    '''
+    feromoni spaziali: un layer numpy 2D (width x height) per ogni tipo di
+    feromone, tutti impilati in levels[tipo, x, y].
+
+    durante lo step le api chiamano deposit() che si limita a mettere il
+    deposito in coda; step() li applica tutti insieme, poi fa diffondere ed
+    evaporare tutti i layer con uno stencil 3x3 sul toro. concentration() e
+    gradient() leggono solo le celle attorno a pos.
+
+    diffusion, evaporation e max_level possono essere un numero (uguale per
+    tutti i tipi) o un dict {tipo: valore}; max_level None vuol dire senza tetto.
+    '''
+
+    def __init__(self, width, height, types=PHEROMONES, diffusion=0.1, evaporation=0.01,
+                 max_level=1.0, initial=None):
+        self.width = width
+        self.height = height
+        self.types = tuple(types)
+        self.index = {name: i for i, name in enumerate(self.types)}
+        self.levels = np.zeros((len(self.types), width, height))
+        for name, value in (initial or {}).items():
+            self.levels[self.index[name]] = value
+
+        self.diffusion = self._per_type(diffusion)
+        self.evaporation = self._per_type(evaporation)
+        self.max_level = self._per_type(max_level)
+
+        # depositi in coda fino al prossimo step()
+        self._layers = []
+        self._x = []
+        self._y = []
+        self._amounts = []
+        self._uniform = np.zeros(len(self.types))
+
+    def _per_type(self, value):
+        if not isinstance(value, dict):
+            value = {name: value for name in self.types}
+        values = [np.inf if value.get(name) is None else value[name] for name in self.types]
+        return np.array(values, dtype=float)[:, None, None]
+
+    def layer(self, name):
+        # vista, non copia
+        return self.levels[self.index[name]]
+
+    def deposit(self, name, pos, amount):
+        # pos None: stessa quantità su tutta la griglia (i vecchi feromoni "globali")
+        if pos is None:
+            self._uniform[self.index[name]] += amount
+            return
+        self._layers.append(self.index[name])
+        self._x.append(pos[0])
+        self._y.append(pos[1])
+        self._amounts.append(amount)
+
+    def deposit_many(self, name, x, y, amounts):
+        # versione vettoriale di deposit() per chi ha già gli array delle posizioni
+        x = np.asarray(x)
+        self._layers.extend([self.index[name]] * len(x))
+        self._x.extend(x.tolist())
+        self._y.extend(np.asarray(y).tolist())
+        self._amounts.extend(np.broadcast_to(amounts, x.shape).tolist())
+
+    def commit(self):
+        if self._amounts:
+            np.add.at(self.levels, (self._layers, self._x, self._y), self._amounts)
+            self._layers, self._x, self._y, self._amounts = [], [], [], []
+        if self._uniform.any():
+            self.levels += self._uniform[:, None, None]
+            self._uniform[:] = 0.0
+        np.clip(self.levels, 0.0, self.max_level, out=self.levels)
+
+    def diffuse(self):
+        # ogni cella tiene (1 - D) del suo feromone e prende D/8 da ciascuno
+        # degli 8 vicini di Moore; sul toro la quantità totale non cambia
+        levels = self.levels
+        box = levels + np.roll(levels, 1, axis=1) + np.roll(levels, -1, axis=1)
+        box = box + np.roll(box, 1, axis=2) + np.roll(box, -1, axis=2)
+        neighbors = box - levels
+        self.levels = (1.0 - self.diffusion) * levels + self.diffusion * neighbors / 8.0
+
+    def evaporate(self):
+        self.levels *= 1.0 - self.evaporation
+
+    def step(self):
+        self.commit()
+        self.diffuse()
+        self.evaporate()
+
+    def concentration(self, name, pos):
+        return float(self.levels[self.index[name], pos[0], pos[1]])
+
+    def gradient(self, name, pos):
+        # differenze centrali sul toro, (d/dx, d/dy)
+        layer = self.levels[self.index[name]]
+        x, y = pos
+        dx = layer[(x + 1) % self.width, y] - layer[(x - 1) % self.width, y]
+        dy = layer[x, (y + 1) % self.height] - layer[x, (y - 1) % self.height]
+        return float(dx) / 2.0, float(dy) / 2.0
+
+    def mean(self, name):
+        return float(self.levels[self.index[name]].mean())
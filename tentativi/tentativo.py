@@ -4,6 +4,7 @@ from mesa.space import MultiGrid
 from mesa.datacollection import DataCollector
 from mesa.visualization.modules import CanvasGrid, ChartModule
 from mesa.visualization.ModularVisualization import ModularServer
+from pheromones import PheromoneField
 
 
 # General Bee class
@@ -50,9 +51,9 @@ class QueenBee(Bee):
 
     def emit_qmp(self):
         # Emit Queen Mandibular Pheromone (QMP)
-        self.model.increase_pheromone('queen', 0.02)
+        self.model.increase_pheromone('queen', 0.02, pos=self.pos)
         # QMP decays over time
-        self.model.increase_pheromone('queen', -0.005)
+        self.model.increase_pheromone('queen', -0.005, pos=self.pos)
 
     def lay_eggs(self):
         self.steps_since_last_egg += 1
@@ -94,7 +95,7 @@ class ForagerBee(Bee):
 
     def emit_forager_pheromone(self):
         # Emit forager-specific pheromone
-        self.model.increase_pheromone('forager', 0.01)
+        self.model.increase_pheromone('forager', 0.01, pos=self.pos)
 
 
 # Nurse Bee Class
@@ -111,11 +112,11 @@ class NurseBee(Bee):
 
     def emit_nurse_pheromone(self):
         # Emit nurse-specific pheromone
-        self.model.increase_pheromone('nurse', 0.01)
+        self.model.increase_pheromone('nurse', 0.01, pos=self.pos)
 
     def attend_brood(self):
         # Nurse bees are attracted to brood pheromone (BRP) to attend to larvae
-        if self.model.get_pheromone_levels()['brood'] > 0.1:
+        if self.model.pheromones.concentration('brood', self.pos) > 0.1:
             # Simulate tending to brood
             self.perform_task()
 
@@ -133,7 +134,7 @@ class GuardBee(Bee):
 
     def emit_guard_pheromone(self):
         # Emit guard-specific pheromone
-        self.model.increase_pheromone('guard', 0.01)
+        self.model.increase_pheromone('guard', 0.01, pos=self.pos)
 
 
 # Cleaner Bee Class
@@ -149,7 +150,7 @@ class CleanerBee(Bee):
 
     def emit_cleaner_pheromone(self):
         # Emit cleaner-specific pheromone
-        self.model.increase_pheromone('cleaner', 0.01)
+        self.model.increase_pheromone('cleaner', 0.01, pos=self.pos)
 
 
 # Egg agent class
@@ -160,7 +161,7 @@ class Egg(Agent):
 
     def step(self):
         # Emit Brood Recognition Pheromone (BRP)
-        self.model.increase_pheromone('brood', 0.01)
+        self.model.increase_pheromone('brood', 0.01, pos=self.pos)
         self.hatch_time -= 1
 
         # Hatch the egg if the time is up
@@ -182,28 +183,33 @@ class HiveModel(Model):
         self.schedule = RandomActivation(self)
         self.next_id_val = N
 
-        # Initialize pheromone levels
-        self.pheromone_levels = {
-            'forager': 0.5,
-            'nurse': 0.5,
-            'guard': 0.5,
-            'cleaner': 0.5,
-            'queen': 1.0,  # QMP starts at max level
-            'brood': 0.0,  # Brood recognition pheromone
-            'footprint': {},  # Footprint pheromones will be position-dependent
-            'queen_footprint': {} # Queen-specific footprint pheromones
-        }
+        # Initialize pheromone levels: un layer sulla griglia per ogni feromone
+        self.pheromones = PheromoneField(
+            width, height,
+            initial={
+                'forager': 0.5,
+                'nurse': 0.5,
+                'guard': 0.5,
+                'cleaner': 0.5,
+                'queen': 1.0,  # QMP starts at max level
+                'brood': 0.0,  # Brood recognition pheromone
+            },
+            # le impronte non hanno tetto, gli altri feromoni restano in [0, 1]
+            max_level={'footprint': None, 'queen_footprint': None,
+                       'forager': 1.0, 'nurse': 1.0, 'guard': 1.0, 'cleaner': 1.0,
+                       'queen': 1.0, 'brood': 1.0}
+        )
 
         # Initialize DataCollector
         self.datacollector = DataCollector(
             model_reporters={
-                "Forager Pheromone": lambda m: m.pheromone_levels['forager'],
-                "Nurse Pheromone": lambda m: m.pheromone_levels['nurse'],
-                "Guard Pheromone": lambda m: m.pheromone_levels['guard'],
-                "Cleaner Pheromone": lambda m: m.pheromone_levels['cleaner'],
-                "Queen Pheromone": lambda m: m.pheromone_levels['queen'],
-                "Brood Pheromone": lambda m: m.pheromone_levels['brood'],
-                "Queen Footprint Pheromone": lambda m: len(m.pheromone_levels['queen_footprint'])
+                "Forager Pheromone": lambda m: m.pheromones.mean('forager'),
+                "Nurse Pheromone": lambda m: m.pheromones.mean('nurse'),
+                "Guard Pheromone": lambda m: m.pheromones.mean('guard'),
+                "Cleaner Pheromone": lambda m: m.pheromones.mean('cleaner'),
+                "Queen Pheromone": lambda m: m.pheromones.mean('queen'),
+                "Brood Pheromone": lambda m: m.pheromones.mean('brood'),
+                "Queen Footprint Pheromone": lambda m: m.pheromones.mean('queen_footprint')
             }
         )
 
@@ -238,32 +244,17 @@ class HiveModel(Model):
         self.datacollector.collect(self)
 
     def get_pheromone_levels(self):
-        return self.pheromone_levels
+        # livello medio sulla griglia di ogni feromone
+        return {name: self.pheromones.mean(name) for name in self.pheromones.types}
 
     def increase_pheromone(self, pheromone, amount, pos=None):
-        if pheromone in ['footprint', 'queen_footprint']:
-            # Footprint pheromones are stored by position
-            if pos in self.pheromone_levels[pheromone]:
-                self.pheromone_levels[pheromone][pos] += amount
-            else:
-                self.pheromone_levels[pheromone][pos] = amount
-        else:
-            # Other pheromones are global for simplicity
-            self.pheromone_levels[pheromone] = min(1.0, self.pheromone_levels[pheromone] + amount)
+        # il deposito resta in coda fino a decay_pheromones, a fine step;
+        # senza pos va su tutta la griglia
+        self.pheromones.deposit(pheromone, pos, amount)
 
     def decay_pheromones(self):
-        decay_rate = 0.01
-
-        # Decay all global pheromones
-        for pheromone in ['forager', 'nurse', 'guard', 'cleaner', 'queen', 'brood']:
-            self.pheromone_levels[pheromone] = max(0.0, self.pheromone_levels[pheromone] - decay_rate)
-
-        # Decay footprint pheromones by position
-        for pheromone_type in ['footprint', 'queen_footprint']:
-            for pos in list(self.pheromone_levels[pheromone_type].keys()):
-                self.pheromone_levels[pheromone_type][pos] -= decay_rate
-                if self.pheromone_levels[pheromone_type][pos] <= 0:
-                    del self.pheromone_levels[pheromone_type][pos]
+        # applica i depositi dello step, poi diffusione ed evaporazione
+        self.pheromones.step()
 
 
 # Visualization portrayal function
@@ -292,30 +283,31 @@ def bee_portrayal(agent):
     return portrayal
 
 
-# Set up the CanvasGrid for visualizing the agents on a grid
-grid_width = 10
-grid_height = 10
-grid = CanvasGrid(bee_portrayal, grid_width, grid_height, 500, 500)
-
-# Create a ChartModule to track pheromone levels over time
-chart = ChartModule([
-    {"Label": "Forager Pheromone", "Color": "green"},
-    {"Label": "Nurse Pheromone", "Color": "blue"},
-    {"Label": "Guard Pheromone", "Color": "red"},
-    {"Label": "Cleaner Pheromone", "Color": "yellow"},
-    {"Label": "Queen Pheromone", "Color": "purple"},
-    {"Label": "Brood Pheromone", "Color": "orange"},
-], data_collector_name='datacollector')
-
-# Set up user-settable parameters for the simulation
-
-# Set up the server to run the simulation with the grid and chart
-server = ModularServer(
-    HiveModel,
-    [grid, chart],  # Add both the grid and chart to the visualization
-    "Bee Hive Simulation",
-    {"N": 10, "width": grid_width, "height": grid_height}
-)
-
-server.port = 8521  # Set the port
-server.launch()     # Start the server
+if __name__ == '__main__':
+    # Set up the CanvasGrid for visualizing the agents on a grid
+    grid_width = 10
+    grid_height = 10
+    grid = CanvasGrid(bee_portrayal, grid_width, grid_height, 500, 500)
+
+    # Create a ChartModule to track pheromone levels over time
+    chart = ChartModule([
+        {"Label": "Forager Pheromone", "Color": "green"},
+        {"Label": "Nurse Pheromone", "Color": "blue"},
+        {"Label": "Guard Pheromone", "Color": "red"},
+        {"Label": "Cleaner Pheromone", "Color": "yellow"},
+        {"Label": "Queen Pheromone", "Color": "purple"},
+        {"Label": "Brood Pheromone", "Color": "orange"},
+    ], data_collector_name='datacollector')
+
+    # Set up user-settable parameters for the simulation
+
+    # Set up the server to run the simulation with the grid and chart
+    server = ModularServer(
+        HiveModel,
+        [grid, chart],  # Add both the grid and chart to the visualization
+        "Bee Hive Simulation",
+        {"N": 10, "width": grid_width, "height": grid_height}
+    )
+
+    server.port = 8521  # Set the port
+    server.launch()     # Start the server